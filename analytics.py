@@ -0,0 +1,422 @@
+"""
+SPHAERA ANALYTICS
+Rolling risk statistics and cross-market correlations over the daily price
+matrix, maintained bar by bar
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+TRADING_DAYS = 252
+
+# Realized volatility windows, in bars
+VOL_WINDOWS = {'1M': 21, '3M': 63}
+
+# Max drawdown look-back, in bars
+DRAWDOWN_WINDOW = TRADING_DAYS
+
+# Latest 1M return scored against every 1M return over the past year
+ZSCORE_HORIZON = 21
+ZSCORE_HISTORY = TRADING_DAYS
+
+# Correlation windows, in bars
+CORRELATION_WINDOWS = {'1M': 21, '3M': 63, '1Y': TRADING_DAYS}
+
+RISK_COLUMNS = ['Vol 1M %', 'Vol 3M %', 'Max DD 1Y %', 'Drawdown %', '1M Z']
+
+# ============================================================================
+# ROLLING WINDOW SUMS
+# ============================================================================
+
+class RollingMoments:
+    """Count, sum and sum of squares of the last `window` vectors, O(n) per push.
+
+    NaN entries are skipped. The sums are rebuilt from the buffer once per
+    window, so add/subtract rounding error can't accumulate. The last push
+    can be taken back with pop().
+    """
+
+    def __init__(self, window, n):
+        self.window = window
+        self.buffer = np.full((window, n), np.nan)
+        self.pos = 0
+        self.pushes = 0
+        self.count = np.zeros(n)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.evicted = np.full(n, np.nan)   # the vector the last push overwrote
+
+    def push(self, x):
+        self.evicted = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self.pushes += 1
+
+        if self.pushes % self.window == 0:
+            valid = ~np.isnan(self.buffer)
+            values = np.where(valid, self.buffer, 0.0)
+            self.count, self.sum, self.sumsq = valid.sum(axis=0), values.sum(axis=0), (values ** 2).sum(axis=0)
+            return
+        self._add(self.evicted, x)
+
+    def pop(self):
+        """Take back the last push (one level of undo)"""
+        self.pos = (self.pos - 1) % self.window
+        x = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = self.evicted
+        self.pushes -= 1
+        self._add(x, self.evicted)
+
+    def _add(self, removed, added):
+        for sign, values in ((-1, removed), (1, added)):
+            valid = ~np.isnan(values)
+            values = np.where(valid, values, 0.0)
+            self.count += sign * valid
+            self.sum += sign * values
+            self.sumsq += sign * values ** 2
+
+    def mean(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 0, self.sum / self.count, np.nan)
+
+    def std(self):
+        """Sample standard deviation (NaN with fewer than two values)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = (self.sumsq - self.sum ** 2 / self.count) / (self.count - 1)
+        return np.where(self.count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+class RollingCrossProducts:
+    """Pairwise counts, sums, sums of squares and cross-products of the last `window` vectors.
+
+    O(n^2) per push. A pair only counts rows where both values are present,
+    so tickers with shorter histories still correlate over their overlap.
+    Rebuilt from the buffer once per window, and pop() takes back the last
+    push, like RollingMoments.
+    """
+
+    def __init__(self, window, n):
+        self.window = window
+        self.buffer = np.full((window, n), np.nan)
+        self.pos = 0
+        self.pushes = 0
+        self.count = np.zeros((n, n))
+        self.sum = np.zeros((n, n))    # sum[i, j] = sum of x_i over rows where x_j is present too
+        self.sumsq = np.zeros((n, n))
+        self.cross = np.zeros((n, n))
+        self.evicted = np.full(n, np.nan)
+
+    @staticmethod
+    def _terms(rows):
+        valid = (~np.isnan(rows)).astype(float)
+        values = np.nan_to_num(rows)
+        return valid.T @ valid, values.T @ valid, (values ** 2).T @ valid, values.T @ values
+
+    def push(self, x):
+        self.evicted = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self.pushes += 1
+
+        if self.pushes % self.window == 0:
+            self.count, self.sum, self.sumsq, self.cross = self._terms(self.buffer)
+            return
+        self._add(self.evicted, x)
+
+    def extend(self, rows):
+        """Push many vectors; a block at least a window long is one matrix product instead"""
+        if len(rows) < self.window:
+            for row in rows:
+                self.push(row)
+            return
+        # What the last row would have overwritten, oldest buffered row first
+        history = np.vstack([np.roll(self.buffer, -self.pos, axis=0), rows])
+        self.evicted = history[-self.window - 1].copy()
+        self.buffer[:] = rows[-self.window:]
+        self.pos = 0
+        self.pushes = 0
+        self.count, self.sum, self.sumsq, self.cross = self._terms(self.buffer)
+
+    def pop(self):
+        """Take back the last push (one level of undo)"""
+        self.pos = (self.pos - 1) % self.window
+        x = self.buffer[self.pos].copy()
+        self.buffer[self.pos] = self.evicted
+        self.pushes -= 1
+        self._add(x, self.evicted)
+
+    def _add(self, removed, added):
+        for sign, row in ((-1, removed), (1, added)):
+            count, total, sumsq, cross = self._terms(row[np.newaxis, :])
+            self.count += sign * count
+            self.sum += sign * total
+            self.sumsq += sign * sumsq
+            self.cross += sign * cross
+
+    def correlation(self):
+        """Pairwise Pearson correlation matrix (NaN with fewer than three shared values)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.cross - self.sum * self.sum.T / self.count
+            var = self.sumsq - self.sum ** 2 / self.count
+            corr = cov / np.sqrt(var * var.T)
+        return np.where(self.count > 2, np.clip(corr, -1.0, 1.0), np.nan)
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+class BarEngine:
+    """Statistics for a fixed set of tickers, fed the daily price matrix one bar at a time.
+
+    Prices are forward-filled over each ticker's market holidays. Every bar
+    is one vectorized update across all tickers, and results are cached
+    until the next bar arrives. The last bar is provisional: the price store
+    re-fetches it on every refresh (it may be an intraday print), so when its
+    value changes it is taken back and fed again.
+    """
+
+    stage = 'analytics_update'
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self._lock = threading.RLock()
+        self.revision = 0    # bumped whenever results change, for keying caches downstream
+        self.reset()
+
+    def reset(self):
+        """Forget every bar seen"""
+        n = len(self.tickers)
+        self.last_date = None
+        self.bars = 0
+        self.last_raw = np.full(n, np.nan)
+        self.last_price = np.full(n, np.nan)
+        self.prev_price = np.full(n, np.nan)   # last_price before the last bar, to feed it again
+        self._results = {}
+        self._reset_state(n)
+
+    def _reset_state(self, n):
+        raise NotImplementedError
+
+    def _push(self, price, log_return):
+        raise NotImplementedError
+
+    def _pop(self):
+        """Undo the last _push (self.bars already counts it out)"""
+        raise NotImplementedError
+
+    def _push_many(self, prices, log_returns):
+        for price, log_return in zip(prices, log_returns):
+            self._push(price, log_return)
+            self.bars += 1
+
+    def update(self, close):
+        """Feed a wide Close frame (dates x tickers); rows before the last bar seen are skipped.
+
+        A row for the last bar seen replaces it if any value in it changed.
+        Returns the number of bars consumed.
+        """
+        close = close.reindex(columns=self.tickers).sort_index()
+        with self._lock, timed(self.stage):
+            if self.last_date is not None:
+                if self.is_revised(close):
+                    self.bars -= 1
+                    self._pop()
+                    self.last_price = self.prev_price
+                    close = close[close.index >= self.last_date]
+                else:
+                    close = close[close.index > self.last_date]
+            if close.empty:
+                return 0
+
+            raw = close.to_numpy(dtype=float)
+            # Forward-fill from the last price seen, so returns are continuous across updates
+            prices = pd.DataFrame(np.vstack([self.last_price, raw])).ffill().to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_returns = np.log(prices[1:] / prices[:-1])
+            self._push_many(prices[1:], log_returns)
+
+            self.last_raw, self.last_price, self.prev_price = raw[-1], prices[-1], prices[-2]
+            self.last_date = close.index[-1]
+            self._results = {}
+            self.revision += 1
+            return len(close)
+
+    def is_revised(self, close):
+        """True if close has a new value for the last bar seen: a revised print, or a
+        ticker on another calendar whose bar for that date landed after it was fed"""
+        if self.last_date is None or self.last_date not in close.index:
+            return False
+        row = close.reindex(columns=self.tickers).loc[self.last_date].to_numpy(dtype=float)
+        return bool((~np.isnan(row) & (row != self.last_raw)).any())
+
+    def refresh(self, store, start):
+        """Feed the bars a PriceStore has gained since the last one seen, and any revision of that one; returns self"""
+        # Held throughout, so sessions refreshing the same shared engine take turns
+        with self._lock:
+            self.update(store.load(self.tickers, self.last_date if self.last_date is not None else start))
+        return self
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = compute()
+            return self._results[key]
+
+
+class RiskEngine(BarEngine):
+    """Realized volatility, max drawdown and 1M return z-scores.
+
+    Volatility and z-scores cost O(tickers) per bar. Drawdown updates in
+    O(1) per ticker, except for the rare ticker whose peak just left the
+    window, which is rescanned.
+    """
+
+    stage = 'risk_update'
+
+    def _reset_state(self, n):
+        # Last DRAWDOWN_WINDOW prices (ring buffer)
+        self.prices = np.full((DRAWDOWN_WINDOW, n), np.nan)
+
+        self.vol = {label: RollingMoments(window, n) for label, window in VOL_WINDOWS.items()}
+        self.monthly = RollingMoments(ZSCORE_HISTORY, n)
+        self.latest_monthly = np.full(n, np.nan)
+
+        # Window peak and the (peak, drawdown) pair behind the max drawdown, with bar numbers
+        self.peak = np.full(n, np.nan)
+        self.peak_bar = np.full(n, -1)
+        self.max_dd = np.full(n, np.nan)
+        self.max_dd_peak_bar = np.full(n, -1)
+
+    def _push(self, price, log_return):
+        bar = self.bars
+        self._undo = (self.prices[bar % DRAWDOWN_WINDOW].copy(), self.latest_monthly)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1M log return = log(p_t / p_t-21); the price 21 bars back is still in the ring buffer
+            month_ago = self.prices[(bar - ZSCORE_HORIZON) % DRAWDOWN_WINDOW] if bar >= ZSCORE_HORIZON else np.nan
+            monthly = np.log(price / month_ago)
+        for moments in self.vol.values():
+            moments.push(log_return)
+        self.monthly.push(monthly)
+        self.latest_monthly = monthly
+        self.prices[bar % DRAWDOWN_WINDOW] = price
+
+        # Drawdown: peaks/pairs that just slid out of the window need a rescan, the rest update in O(1)
+        expired = (self.peak_bar <= bar - DRAWDOWN_WINDOW) | (self.max_dd_peak_bar <= bar - DRAWDOWN_WINDOW)
+        expired &= self.peak_bar >= 0
+        has_price = ~np.isnan(price)
+        higher = ~(price <= self.peak) & has_price  # also True where there is no peak yet
+        self.peak = np.where(higher, price, self.peak)
+        self.peak_bar = np.where(higher, bar, self.peak_bar)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = 1 - price / self.peak
+        deeper = ~(drawdown <= self.max_dd) & has_price
+        self.max_dd = np.where(deeper, drawdown, self.max_dd)
+        self.max_dd_peak_bar = np.where(deeper, self.peak_bar, self.max_dd_peak_bar)
+        if expired.any():
+            self._rescan(np.flatnonzero(expired), bar + 1)
+
+    def _pop(self):
+        bar = self.bars
+        evicted, self.latest_monthly = self._undo
+        for moments in self.vol.values():
+            moments.pop()
+        self.monthly.pop()
+        self.prices[bar % DRAWDOWN_WINDOW] = evicted
+
+        # The price just taken back may have set a peak or the max drawdown: rescan the window
+        if bar:
+            self._rescan(np.arange(len(self.tickers)), bar)
+        else:
+            self.peak[:], self.peak_bar[:], self.max_dd[:], self.max_dd_peak_bar[:] = np.nan, -1, np.nan, -1
+
+    def _rescan(self, cols, bars):
+        """Recompute peak and max drawdown over the price window for a few tickers"""
+        first_bar = bars - min(bars, DRAWDOWN_WINDOW)
+        window = self.prices[np.arange(first_bar, bars) % DRAWDOWN_WINDOW][:, cols]
+
+        valid = ~np.isnan(window).all(axis=0)
+        running = np.fmax.accumulate(window, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.nan_to_num(1 - window / running, nan=-np.inf)
+        trough = drawdown.argmax(axis=0)
+        peak_pos = np.array([np.nanargmax(window[:t + 1, i]) if valid[i] else 0 for i, t in enumerate(trough)])
+        top_pos = np.array([np.nanargmax(window[:, i]) if valid[i] else 0 for i in range(len(cols))])
+
+        self.peak[cols] = np.where(valid, window[top_pos, np.arange(len(cols))], np.nan)
+        self.peak_bar[cols] = np.where(valid, first_bar + top_pos, -1)
+        self.max_dd[cols] = np.where(valid, drawdown[trough, np.arange(len(cols))], np.nan)
+        self.max_dd_peak_bar[cols] = np.where(valid, first_bar + peak_pos, -1)
+
+    def table(self):
+        """tickers x RISK_COLUMNS"""
+        def compute():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = (self.latest_monthly - self.monthly.mean()) / self.monthly.std()
+                drawdown = 1 - self.last_price / self.peak
+            return pd.DataFrame({
+                **{f'Vol {label} %': moments.std() * np.sqrt(TRADING_DAYS) * 100 for label, moments in self.vol.items()},
+                'Max DD 1Y %': -self.max_dd * 100,
+                'Drawdown %': -drawdown * 100,
+                '1M Z': z,
+            }, index=self.tickers).round(2)[RISK_COLUMNS]
+        return self._cached('table', compute)
+
+
+class CorrelationEngine(BarEngine):
+    """Correlation of daily log returns over one CORRELATION_WINDOWS window, O(tickers^2) per bar.
+
+    Holds four tickers x tickers float64 matrices (32 MB each at 2,000
+    tickers), so each engine keeps a single window.
+    """
+
+    stage = 'correlation_update'
+
+    def __init__(self, tickers, window='3M'):
+        self.window = window
+        super().__init__(tickers)
+
+    def _reset_state(self, n):
+        self.products = RollingCrossProducts(CORRELATION_WINDOWS[self.window], n)
+
+    def _push_many(self, prices, log_returns):
+        self.products.extend(log_returns)
+        self.bars += len(log_returns)
+
+    def _pop(self):
+        self.products.pop()
+
+    def matrix(self):
+        """tickers x tickers correlation over the engine's window"""
+        return self._cached(
+            'matrix',
+            lambda: pd.DataFrame(self.products.correlation(), index=self.tickers, columns=self.tickers),
+        )
+
+# ============================================================================
+# LABELLING
+# ============================================================================
+
+def risk_by_country(table, markets):
+    """One row per (country, index/FX) instrument with the risk columns"""
+    rows = []
+    for country, info in markets.items():
+        for asset, ticker in (('Index', info['index']), ('FX', info['currency'])):
+            if ticker in table.index:
+                rows.append({'Flag': info['flag'], 'Country': country, 'Asset': asset, 'Ticker': ticker,
+                             **table.loc[ticker].to_dict()})
+    return pd.DataFrame(rows, columns=['Flag', 'Country', 'Asset', 'Ticker', *RISK_COLUMNS])
+
+
+def instrument_labels(markets):
+    """{ticker: label} for every index then every currency, so the heatmap shows equity and FX blocks"""
+    labels = {}
+    for key in ('index', 'currency'):
+        for country, info in markets.items():
+            if info[key] != 'N/A':
+                labels.setdefault(info[key], f"{info['flag']} {info[key]}")
+    return labels
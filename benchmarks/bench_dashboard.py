@@ -0,0 +1,185 @@
+"""
+SPHAERA BENCHMARK - DASHBOARD BUILD & RENDER
+Runs the dashboard's data build and render logic fully offline against a
+local yfinance stand-in and reports cold/warm load time, per-stage timings,
+peak memory and how they scale with the size of the universe.
+
+Run from the repo root:
+    python benchmarks/bench_dashboard.py
+    python benchmarks/bench_dashboard.py --sizes 25 100 1000 --latency 0.3
+    python benchmarks/bench_dashboard.py --replay recording.csv --json results.json
+    python benchmarks/bench_dashboard.py --local parquet   # history from a local file, not the yfinance path
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import market_data  # noqa: E402
+from market_data import market_tickers, download_history, refresh_history, compute_returns, build_dashboard_data  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+from render import DEFAULT_COLUMNS, CHART_TYPES, style_table, build_chart  # noqa: E402
+from market_stand_in import SyntheticMarket, ReplayMarket, synthetic_universe, synthetic_macro  # noqa: E402
+
+DEFAULT_SIZES = [25, 100, 250, 500, 1000]
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class Stages:
+    """Collects wall-clock milliseconds per named stage"""
+
+    def __init__(self):
+        self.ms = {}
+
+    def run(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.ms[name] = self.ms.get(name, 0.0) + (time.perf_counter() - start) * 1000
+        return result
+
+
+def universe_for(tickers):
+    """EM_MARKETS-shaped config for a recording: pair index tickers with '=X' currencies"""
+    currencies = [t for t in tickers if t.endswith('=X')]
+    indices = [t for t in tickers if not t.endswith('=X')]
+    markets = synthetic_universe(len(currencies))
+    for info, ccy, idx in zip(markets.values(), currencies, indices + ['N/A'] * len(currencies)):
+        info['currency'], info['index'] = ccy, idx
+    return markets
+
+
+def render(stages, df):
+    """Everything a page view does with a snapshot: style the table and build every chart"""
+    table = stages.run('style table', style_table, df, DEFAULT_COLUMNS)
+
+    def streamlit_marshal(styler):
+        # What st.dataframe does with a Styler
+        styler._compute()
+        styler._translate(False, False)
+
+    stages.run('marshal table', streamlit_marshal, table.styler())
+    for chart_type in CHART_TYPES:
+        fig = stages.run('build charts', build_chart, df, chart_type)
+        stages.run('serialize charts', fig.to_json)
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def cold_load(markets, macro, tickers, store):
+    """Empty store: full history download, then build and render"""
+    stages = Stages()
+    history = stages.run('download', download_history, tickers)
+    stages.run('store save', store.save, history)
+    history = stages.run('store load', store.load, tickers, market_data.history_start())
+    stages.run('returns engine', compute_returns, history)
+    df = stages.run('build table', build_dashboard_data, markets, macro, history)
+    render(stages, df)
+    return stages
+
+
+def warm_load(markets, macro, tickers, store):
+    """Populated store: incremental top-up only, then build and render"""
+    stages = Stages()
+    history = stages.run('refresh (top-up)', refresh_history, store, tickers)
+    df = stages.run('build table', build_dashboard_data, markets, macro, history)
+    render(stages, df)
+    return stages
+
+
+def bench_universe(markets, market, local=None):
+    """Cold then warm load of one universe into throwaway price stores"""
+    tickers = market_tickers(markets)
+    macro = synthetic_macro(markets)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if local:
+            market.install_local(os.path.join(tmp, f'history.{local}'))
+        else:
+            market.install()
+        store = PriceStore(os.path.join(tmp, 'prices.sqlite'))
+
+        market.calls = market.rows_served = 0
+        start = time.perf_counter()
+        cold = cold_load(markets, macro, tickers, store)
+        cold_ms = (time.perf_counter() - start) * 1000
+        cold_calls, cold_rows = market.calls, market.rows_served
+
+        market.calls = market.rows_served = 0
+        start = time.perf_counter()
+        warm = warm_load(markets, macro, tickers, store)
+        warm_ms = (time.perf_counter() - start) * 1000
+        warm_calls, warm_rows = market.calls, market.rows_served
+
+        # Peak memory in a separate cold pass, since tracemalloc slows everything down
+        tracemalloc.start()
+        cold_load(markets, macro, tickers, PriceStore(os.path.join(tmp, 'peak.sqlite')))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'countries': len(markets),
+        'tickers': len(tickers),
+        'cold_ms': round(cold_ms, 1),
+        'warm_ms': round(warm_ms, 1),
+        'peak_mb': round(peak / 1e6, 1),
+        'cold_calls': cold_calls,
+        'cold_rows': cold_rows,
+        'warm_calls': warm_calls,
+        'warm_rows': warm_rows,
+        'cold_stages_ms': {k: round(v, 1) for k, v in cold.ms.items()},
+        'warm_stages_ms': {k: round(v, 1) for k, v in warm.ms.items()},
+    }
+
+
+def print_report(results):
+    print(f"{'countries':>9} {'tickers':>7} {'cold ms':>9} {'warm ms':>9} {'peak MB':>8} "
+          f"{'cold calls/rows':>16} {'warm calls/rows':>16}")
+    for r in results:
+        print(f"{r['countries']:>9} {r['tickers']:>7} {r['cold_ms']:>9.1f} {r['warm_ms']:>9.1f} {r['peak_mb']:>8.1f} "
+              f"{r['cold_calls']:>7}/{r['cold_rows']:<8} {r['warm_calls']:>7}/{r['warm_rows']:<8}")
+
+    for r in results:
+        print(f"\nStages, {r['countries']} countries (ms)")
+        for phase in ('cold', 'warm'):
+            stages = ', '.join(f"{name} {ms:.1f}" for name, ms in r[f'{phase}_stages_ms'].items())
+            print(f"  {phase}: {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline dashboard build/render benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="universe sizes (countries)")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated seconds per download call")
+    parser.add_argument('--replay', help="replay a recorded Close history CSV instead of synthetic data")
+    parser.add_argument('--local', choices=['csv', 'parquet'],
+                        help="serve history through the local-file provider in this format instead of the yfinance path")
+    parser.add_argument('--json', help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    if args.replay:
+        market = ReplayMarket.load(args.replay, latency=args.latency)
+        results.append(bench_universe(universe_for(list(market.close.columns)), market, args.local))
+    else:
+        for size in args.sizes:
+            markets = synthetic_universe(size)
+            market = SyntheticMarket(market_tickers(markets), latency=args.latency)
+            results.append(bench_universe(markets, market, args.local))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+SPHAERA BENCHMARK - HISTORY CACHE MEMORY
+Bytes per universe size for full yfinance OHLCV frames vs the float32 Close
+history cache, and a long-running mix of region loads against a fixed memory
+budget: held memory, hit rate, evictions and load latency.
+
+Run from the repo root:
+    python benchmarks/bench_history_cache.py
+    python benchmarks/bench_history_cache.py --sizes 100 1000 4000 --budget-mb 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from history_cache import HistoryCache  # noqa: E402
+from market_data import market_tickers, history_start  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+from market_stand_in import SyntheticMarket, synthetic_universe  # noqa: E402
+
+DEFAULT_SIZES = [25, 250, 1000, 2500]
+
+# Tickers per simulated region view
+REGION_TICKERS = 20
+
+
+def bench_size(countries, budget_mb, loads, seed=0):
+    markets = synthetic_universe(countries)
+    tickers = market_tickers(markets)
+    market = SyntheticMarket(tickers)
+    start = history_start()
+
+    ohlcv_bytes = int(market.download(tickers).memory_usage(deep=True).sum())
+    wide_bytes = int(market.close.memory_usage(deep=True).sum())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, 'prices.sqlite'))
+        store.save(market.close)
+        cache = HistoryCache(store, budget_bytes=budget_mb * 2 ** 20)
+
+        # Skewed views: a few regions are on most screens, the long tail occasionally
+        rng = np.random.default_rng(seed)
+        regions = [tickers[i:i + REGION_TICKERS] for i in range(0, len(tickers), REGION_TICKERS)]
+        weights = 1 / np.arange(1, len(regions) + 1)
+        ms = []
+        held = 0.0
+        for pick in rng.choice(len(regions), size=loads, p=weights / weights.sum()):
+            t0 = time.perf_counter()
+            cache.load(regions[pick], start)
+            ms.append((time.perf_counter() - t0) * 1000)
+            held = max(held, cache.footprint()['mb'])
+
+        t0 = time.perf_counter()
+        store.load(regions[0], start)
+        sqlite_ms = (time.perf_counter() - t0) * 1000
+
+    footprint = cache.footprint()
+    return {
+        'countries': countries,
+        'tickers': len(tickers),
+        'ohlcv_mb': ohlcv_bytes / 2 ** 20,
+        'wide_f64_mb': wide_bytes / 2 ** 20,
+        'peak_held_mb': held,
+        'hit_rate': footprint['hits'] / max(footprint['hits'] + footprint['misses'], 1),
+        'evictions': footprint['evictions'],
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'sqlite_ms': sqlite_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History cache memory and hit rate by universe size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="countries per universe")
+    parser.add_argument('--budget-mb', type=float, default=4, help="history cache budget")
+    parser.add_argument('--loads', type=int, default=500, help="region loads per universe")
+    args = parser.parse_args()
+
+    print(f"Budget {args.budget_mb} MB, {args.loads} region loads of {REGION_TICKERS} tickers each\n")
+    print(f"{'countries':>9} {'tickers':>8} {'OHLCV MB':>9} {'Close f64':>10} {'held MB':>8} "
+          f"{'hit rate':>8} {'evicted':>8} {'p50 ms':>7} {'p95 ms':>7} {'sqlite ms':>9}")
+    for size in args.sizes:
+        r = bench_size(size, args.budget_mb, args.loads)
+        print(f"{r['countries']:>9} {r['tickers']:>8} {r['ohlcv_mb']:>9.1f} {r['wide_f64_mb']:>10.1f} "
+              f"{r['peak_held_mb']:>8.2f} {r['hit_rate']:>8.0%} {r['evictions']:>8} "
+              f"{r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['sqlite_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
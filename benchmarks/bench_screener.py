@@ -0,0 +1,97 @@
+"""
+SPHAERA BENCHMARK - SCREENER
+The whole styled table plus per-metric idxmax/idxmin scans (the original
+Market Overview) vs the screener: sort orders built once per snapshot, then a
+filtered, sorted page styled and sent per query. Payload is the Arrow-encoded
+table Streamlit sends to the browser.
+
+Run from the repo root:  python benchmarks/bench_screener.py
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import DEFAULT_COLUMNS, key_metrics, style_table  # noqa: E402
+from screener import PAGE_SIZE, Screen, ScreenIndex  # noqa: E402
+
+ROW_COUNTS = [25, 250, 1000, 5000]
+NUMERIC_COLUMNS = ['1M %', 'YTD %', 'FX 1M %', '10Y Yield', 'Yield Δ', 'Inflation', 'Real Rate', 'Policy Rate']
+
+# ============================================================================
+# ORIGINAL SUMMARY METRICS (copied from the pre-screener dashboard)
+# ============================================================================
+
+def scan_key_metrics(df):
+    valid_data = df[df['1M %'].notna()]
+    valid_ytd = df[df['YTD %'].notna()]
+    if valid_data.empty:
+        return []
+    best = valid_data.loc[valid_data['1M %'].idxmax()]
+    worst = valid_data.loc[valid_data['1M %'].idxmin()]
+    best_ytd = valid_ytd.loc[valid_ytd['YTD %'].idxmax()]
+    avg = valid_data['1M %'].mean()
+    highest = df.loc[df['10Y Yield'].idxmax()]
+    return [best['Country'], worst['Country'], best_ytd['Country'], f"{avg:.1f}%",
+            f"{len(valid_data[valid_data['1M %'] > 0])}/{len(valid_data)} +", highest['Country']]
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def synthetic_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Flag': ['🏳️'] * rows,
+        'Country': [f'Country {i:04d}' for i in range(rows)],
+        'Index': [f'IDX{i:04d}' for i in range(rows)],
+        **{col: rng.normal(0, 5, rows).round(2) for col in NUMERIC_COLUMNS},
+        'As Of': pd.Timestamp.today().normalize(),
+        'Stale': rng.random(rows) < 0.05,
+    })
+    df.iloc[::7, 3] = np.nan  # some missing 1M returns, like failed fetches
+    return df
+
+
+def payload_bytes(df):
+    return pa.Table.from_pandas(df).nbytes
+
+
+def best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    screen = Screen('YTD %', ranges=(('10Y Yield', -5, 5),), valid_only=True, page=1)
+    print(f"Full table vs one screener page of {PAGE_SIZE} rows (sorted by YTD, one range filter, valid only)")
+    print(f"{'rows':>6} | {'full ms':>8} {'full KB':>8} | {'index ms':>8} {'query ms':>8} {'page ms':>8} {'page KB':>8}")
+    for rows in ROW_COUNTS:
+        df = synthetic_table(rows)
+        repeat = max(5, 2000 // rows)
+
+        index = ScreenIndex(df)
+        expected = scan_key_metrics(df)
+        cards = key_metrics(index)
+        assert [cards[0][1].split(' ', 1)[1], cards[1][1].split(' ', 1)[1], cards[2][1].split(' ', 1)[1],
+                cards[3][1], cards[3][2], cards[4][1].split(' ', 1)[1]] == expected, "summary mismatch"
+
+        # Original: the summary scans, then the whole table styled and sent on every rerun
+        full = best_ms(lambda: (scan_key_metrics(df), style_table(df, DEFAULT_COLUMNS).styler()._compute()), repeat)
+        # Screener: the index once per snapshot, then a query, the summary and one styled page per rerun
+        build = best_ms(lambda: ScreenIndex(df), repeat)
+        query = best_ms(lambda: index.query(screen), repeat)
+        page = index.query(screen).data
+        per_page = best_ms(lambda: (key_metrics(index), style_table(page, DEFAULT_COLUMNS).styler()._compute()), repeat)
+
+        print(f"{rows:>6} | {full:>8.2f} {payload_bytes(df[DEFAULT_COLUMNS]) / 1024:>8.1f} | {build:>8.2f} "
+              f"{query:>8.3f} {per_page:>8.2f} {payload_bytes(page[DEFAULT_COLUMNS]) / 1024:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
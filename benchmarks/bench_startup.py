@@ -0,0 +1,101 @@
+"""
+SPHAERA BENCHMARK - COLD START
+Import time of the dashboard's modules (fresh interpreter each run) with the
+old eager yfinance/Plotly imports vs the lazy ones, and the per-rerun payload
+of the header + sidebar logos inlined as base64 vs served from static/.
+
+Run from the repo root:  python benchmarks/bench_startup.py
+"""
+
+import argparse
+import ast
+import base64
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SCRIPT = os.path.join(REPO, 'sphaera_dashboard_simple-7.py')
+STATIC_DIR = os.path.join(REPO, 'static')
+LOGOS = ['sphaera_dashboard_header.png', 'sphaera_icon_150.png']
+
+# What used to be imported eagerly on top of the app's own imports
+EAGER_MODULES = ['yfinance', 'plotly.express', 'plotly.graph_objects']
+
+# ============================================================================
+# IMPORT TIME
+# ============================================================================
+
+def app_modules(path=APP_SCRIPT):
+    """Modules the script imports before it draws anything, read from its top-level import statements"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and not node.level:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+def import_ms(modules):
+    """Wall-clock ms to import modules in a fresh interpreter"""
+    code = (
+        'import time; start = time.perf_counter()\n'
+        + ''.join(f'import {m}\n' for m in modules)
+        + 'print((time.perf_counter() - start) * 1000)'
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO, check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def best_import_ms(modules, repeat):
+    return min(import_ms(modules) for _ in range(repeat))
+
+# ============================================================================
+# LOGO PAYLOAD
+# ============================================================================
+
+def logo_payload(filename, fallback_bytes):
+    """(inline bytes, static bytes) of the <img src> for one logo, per rerun"""
+    path = os.path.join(STATIC_DIR, filename)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        data = bytes(fallback_bytes)
+    inline = 'data:image/png;base64,' + base64.b64encode(data).decode()
+    return len(inline), len(f'app/static/{filename}'), os.path.exists(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard import time and logo payload")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per measurement (best of)")
+    parser.add_argument('--logo-bytes', type=int, default=60_000,
+                        help="assumed PNG size when a logo isn't in static/")
+    args = parser.parse_args()
+
+    modules = app_modules()
+    eager = best_import_ms(modules + EAGER_MODULES, args.repeat)
+    lazy = best_import_ms(modules, args.repeat)
+    print(f"Import time of the app's {len(modules)} modules (best of {args.repeat} fresh interpreters)")
+    print(f"  eager yfinance + Plotly  {eager:8.0f} ms")
+    print(f"  lazy (current)           {lazy:8.0f} ms   ({eager - lazy:.0f} ms saved)")
+
+    print("\nLogo payload sent with every rerun")
+    total_inline = total_static = 0
+    for filename in LOGOS:
+        inline, static, found = logo_payload(filename, args.logo_bytes)
+        total_inline += inline
+        total_static += static
+        note = '' if found else f'  (not in static/, assuming {args.logo_bytes:,} byte PNG)'
+        print(f"  {filename:30} base64 {inline:>9,} B   static URL {static:>4} B{note}")
+    print(f"  {'total':30} base64 {total_inline:>9,} B   static URL {total_static:>4} B")
+
+
+if __name__ == '__main__':
+    main()
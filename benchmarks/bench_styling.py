@@ -0,0 +1,122 @@
+"""
+SPHAERA BENCHMARK - TABLE STYLING
+Per-cell applymap callbacks (the original dashboard code) vs the vectorized
+column-wise styling in render.py, on synthetic tables of growing size.
+
+Run from the repo root:  python benchmarks/bench_styling.py
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import style_column, table_css  # noqa: E402
+
+ROW_COUNTS = [25, 250, 1000, 5000]
+PERF_COLS = ['1M %', '3M %', 'YTD %', 'FX 1M %']
+
+# ============================================================================
+# ORIGINAL PER-CELL CALLBACKS (copied from the pre-vectorized dashboard)
+# ============================================================================
+
+def color_cells(val):
+    if isinstance(val, (int, float)):
+        if val > 0:
+            return 'background-color: #1e3a1e; color: #90ee90'
+        elif val < 0:
+            return 'background-color: #3a1e1e; color: #ff9999'
+    return ''
+
+def color_yield_change(val):
+    if isinstance(val, (int, float)):
+        if val > 0.1:
+            return 'background-color: #3a1e1e; color: #ff9999; font-weight: bold'
+        elif val < -0.1:
+            return 'background-color: #1e3a1e; color: #90ee90; font-weight: bold'
+    return ''
+
+def color_real_rate(val):
+    if isinstance(val, (int, float)):
+        if val < -5:
+            return 'background-color: #4a1e1e; color: #ff6666; font-weight: bold'
+        elif val < 0:
+            return 'background-color: #3a1e1e; color: #ff9999'
+        elif val > 3:
+            return 'background-color: #1e4a1e; color: #66ff66; font-weight: bold'
+        elif val > 0:
+            return 'background-color: #1e3a1e; color: #90ee90'
+    return ''
+
+# ============================================================================
+# STYLERS UNDER TEST
+# ============================================================================
+
+def synthetic_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.normal(0, 5, rows).round(2) for col in PERF_COLS})
+    df['Yield Δ'] = rng.normal(0, 0.5, rows).round(1)
+    df['Real Rate'] = rng.normal(1, 5, rows).round(1)
+    df.iloc[::7, 0] = np.nan  # some missing values, like failed fetches
+    return df
+
+
+def cell_map(styler, func, subset):
+    # Styler.applymap was renamed to Styler.map in pandas 2.1 (and removed in 3.0)
+    if hasattr(styler, 'map'):
+        return styler.map(func, subset=subset)
+    return styler.applymap(func, subset=subset)
+
+
+def per_cell_styler(df):
+    styler = cell_map(df.style, color_cells, PERF_COLS)
+    styler = cell_map(styler, color_yield_change, ['Yield Δ'])
+    return cell_map(styler, color_real_rate, ['Real Rate'])
+
+
+def vectorized_styler(df):
+    return df.style.apply(style_column, axis=0)
+
+
+def computed_css(styler):
+    """Run the styling like Streamlit does (Styler._compute) and return {(row, col): css}"""
+    styler._compute()
+    return {key: '; '.join(f'{k}: {v}' for k, v in props) for key, props in styler.ctx.items() if props}
+
+
+def per_cell_css(df):
+    """Just the color rules, one Python call per cell"""
+    css = {col: df[col].map(color_cells) for col in PERF_COLS}
+    css['Yield Δ'] = df['Yield Δ'].map(color_yield_change)
+    css['Real Rate'] = df['Real Rate'].map(color_real_rate)
+    return pd.DataFrame(css)
+
+
+def best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    print("CSS rules only (what the dashboard memoizes per snapshot) and full Styler._compute (what Streamlit runs)")
+    print(f"{'rows':>6} {'cells':>7} | {'rules: cell ms':>14} {'vector ms':>10} {'x':>6} | {'styler: cell ms':>15} {'vector ms':>10} {'x':>6}")
+    for rows in ROW_COUNTS:
+        df = synthetic_table(rows)
+
+        assert computed_css(per_cell_styler(df)) == computed_css(vectorized_styler(df)), "CSS mismatch"
+
+        repeat = max(5, 5000 // rows)
+        rules_cell = best_ms(lambda: per_cell_css(df), repeat)
+        rules_vec = best_ms(lambda: table_css(df), repeat)
+        styler_cell = best_ms(lambda: per_cell_styler(df)._compute(), repeat)
+        styler_vec = best_ms(lambda: vectorized_styler(df)._compute(), repeat)
+
+        print(f"{rows:>6} {df.size:>7} | {rules_cell:>14.2f} {rules_vec:>10.2f} {rules_cell / rules_vec:>5.1f}x"
+              f" | {styler_cell:>15.2f} {styler_vec:>10.2f} {styler_cell / styler_vec:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+SPHAERA BENCHMARK - LOCAL MARKET DATA STAND-IN
+Offline replacement for yfinance.download, serving recorded or synthetic
+daily history in the same shape yfinance returns.
+
+    market = SyntheticMarket(tickers)            # deterministic random walks
+    market = ReplayMarket.load('recording.csv')  # a recorded real download
+    market.install()                             # market_data now downloads from it
+    market.install_local('history.parquet')      # ... or reads it back through the local-file provider
+"""
+
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import market_data
+import providers
+from macro_store import MacroHistory
+from providers import YFinanceProvider, LocalFileProvider
+
+FIELDS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+
+class LocalMarket:
+    """yf.download stand-in backed by an in-memory wide Close frame.
+
+    Optional `latency` (seconds per call) simulates the network so cold vs
+    warm loads reflect how many requests each path makes. Counts calls and
+    rows served.
+    """
+
+    def __init__(self, close, latency=0.0):
+        self.close = close.sort_index()
+        self.latency = latency
+        self.calls = 0
+        self.rows_served = 0
+
+    def download(self, tickers, start=None, end=None, period=None, progress=False, threads=True, **kwargs):
+        """Same call shape and (Price, Ticker) MultiIndex output as yfinance.download"""
+        if isinstance(tickers, str):
+            tickers = tickers.split()
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        close = self.close.reindex(columns=tickers)
+        if start is not None:
+            close = close[close.index >= pd.Timestamp(start)]
+        if end is not None:
+            close = close[close.index < pd.Timestamp(end)]
+        close = close.dropna(how='all')
+        self.rows_served += int(close.notna().sum().sum())
+
+        frame = pd.concat({field: close for field in FIELDS}, axis=1)
+        frame.columns.names = ['Price', 'Ticker']
+        frame.index.name = 'Date'
+        return frame
+
+    def install(self):
+        """Route market_data's downloads through the yfinance provider, backed by this stand-in"""
+        providers.yf = self
+        market_data.provider = YFinanceProvider()
+        return self
+
+    def install_local(self, path):
+        """Save the history to path and have market_data read it through the local-file provider (no download calls)"""
+        self.save(path)
+        market_data.provider = LocalFileProvider(path)
+        return self
+
+    def save(self, path):
+        """Write the Close history (Parquet for a .parquet path, else CSV) so a run can be replayed later"""
+        if path.endswith('.parquet'):
+            self.close.to_parquet(path)
+        else:
+            self.close.to_csv(path)
+
+
+class SyntheticMarket(LocalMarket):
+    """Deterministic geometric random walks (per-ticker seed) on business days"""
+
+    def __init__(self, tickers, end=None, days=400, latency=0.0):
+        end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+        dates = pd.bdate_range(end - pd.Timedelta(days=days), end, name='Date')
+        paths = {}
+        for ticker in tickers:
+            rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+            paths[ticker] = 100 * np.exp(np.cumsum(rng.normal(0, 0.012, len(dates))))
+        super().__init__(pd.DataFrame(paths, index=dates), latency)
+
+
+class ReplayMarket(LocalMarket):
+    """Replays a recorded Close history (see record())"""
+
+    @classmethod
+    def load(cls, path, latency=0.0):
+        close = pd.read_csv(path, index_col=0, parse_dates=True)
+        return cls(close, latency)
+
+
+def record(tickers, path, start=None):
+    """Download real history once (needs network) and save it for offline replay"""
+    close = market_data.download_history(tickers, start)
+    LocalMarket(close).save(path)
+    return close
+
+
+def synthetic_universe(size):
+    """EM_MARKETS-shaped config with `size` countries (index + currency per country)"""
+    return {
+        f'Market {i:04d}': {'index': f'IDX{i:04d}', 'currency': f'CCY{i:04d}=X', 'flag': '🏳️'}
+        for i in range(size)
+    }
+
+
+def synthetic_macro(markets, end=None, months=4):
+    """MacroHistory with a month-start yield / policy rate / inflation print per country"""
+    rng = np.random.default_rng(len(markets))
+    dates = pd.date_range(end=pd.Timestamp(end or pd.Timestamp.today()), periods=months, freq='MS')
+    rows = []
+    for country in markets:
+        policy_rate = float(rng.uniform(0, 30))
+        for on in dates:
+            policy_rate = max(0.0, policy_rate + float(rng.normal(0, 0.25)))
+            rows += [
+                (on, country, 'yield_10y', round(policy_rate + float(rng.normal(0.5, 1.5)), 1)),
+                (on, country, 'policy_rate', round(policy_rate, 2)),
+                (on, country, 'inflation', round(float(rng.uniform(-1, 30)), 2)),
+            ]
+    return MacroHistory(pd.DataFrame(rows, columns=['date', 'country', 'field', 'value']))
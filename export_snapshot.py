@@ -0,0 +1,110 @@
+"""
+SPHAERA SNAPSHOT EXPORT
+Headless entry point: builds the same dashboard table as the app (no
+Streamlit, no Plotly) and writes timestamped CSV / Parquet / JSON snapshots.
+
+    python export_snapshot.py                       # all formats into data/snapshots/
+    python export_snapshot.py --formats csv json --out-dir /srv/sphaera
+
+Suitable for cron. The dashboard warms its first snapshot from the newest
+export in the same directory.
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from macro_store import MacroStore
+from market_data import load_dashboard_data, refresh_stale_flags
+from price_store import PriceStore, DATA_DIR
+from universe import load_universe
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get('SPHAERA_SNAPSHOT_DIR', os.path.join(DATA_DIR, 'snapshots'))
+FORMATS = ['csv', 'parquet', 'json']
+PREFIX = 'sphaera_em_'
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+def write_snapshot(df, out_dir=SNAPSHOT_DIR, formats=FORMATS, updated_at=None):
+    """Write df as PREFIX<UTC timestamp>.<fmt> for each format; returns the paths written"""
+    updated_at = updated_at or datetime.now(timezone.utc)
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, PREFIX + updated_at.strftime(TIMESTAMP_FORMAT))
+
+    paths = []
+    for fmt in formats:
+        path = f'{base}.{fmt}'
+        if fmt == 'csv':
+            df.to_csv(path, index=False)
+        elif fmt == 'json':
+            # 'table' orient embeds the schema, so dates and flags round-trip
+            df.to_json(path, orient='table', index=False, date_format='iso', force_ascii=False)
+        elif fmt == 'parquet':
+            try:
+                df.to_parquet(path, index=False)
+            except ImportError:
+                logger.warning("Skipping Parquet export: install pyarrow or fastparquet")
+                continue
+        else:
+            raise ValueError(f"Unknown snapshot format: {fmt}")
+        paths.append(path)
+    return paths
+
+
+def read_latest_snapshot(out_dir=SNAPSHOT_DIR, now=None):
+    """(df, updated_at) from the newest Parquet/JSON export, or None if there isn't one.
+
+    Exports are ranked by their timestamp whatever the format (Parquet first
+    on a tie), and 'Stale' is re-evaluated as of `now`.
+    """
+    exports = []
+    for fmt in ('parquet', 'json'):
+        for path in glob.glob(os.path.join(out_dir, f'{PREFIX}*.{fmt}')):
+            stamp = os.path.basename(path)[len(PREFIX):-len(fmt) - 1]
+            try:
+                updated_at = datetime.strptime(stamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            exports.append((updated_at, fmt == 'parquet', fmt, path))
+
+    for updated_at, _, fmt, path in sorted(exports, reverse=True):
+        try:
+            if fmt == 'parquet':
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_json(path, orient='table')
+        except (ImportError, ValueError, OSError):
+            logger.warning("Could not read snapshot %s", path, exc_info=True)
+            continue
+        return refresh_stale_flags(df, now), updated_at
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the EM dashboard table and export it without Streamlit")
+    parser.add_argument('--out-dir', default=SNAPSHOT_DIR, help="where to write snapshots")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    universe = load_universe()
+    df = load_dashboard_data(PriceStore(), universe.markets, MacroStore().history())
+    for path in write_snapshot(df, args.out_dir, args.formats):
+        print(path)
+
+    stale = df.loc[df['Stale'], 'Country'].tolist()
+    if stale:
+        logger.warning("Stale data for: %s", ', '.join(stale))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+SPHAERA CONCURRENT FETCHER
+Bounded thread pool with per-host rate limiting, retries and timeouts
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8          # tickers fetched in parallel
+REQUESTS_PER_SECOND = 4  # sustained request rate per host
+BURST = 8                # requests allowed back-to-back before throttling
+RETRIES = 2              # extra attempts after the first failure
+BACKOFF_SECONDS = 0.5    # base for exponential backoff (with full jitter)
+TICKER_TIMEOUT = 20      # seconds a single ticker may take once a worker picks it up, retries included
+REQUEST_TIMEOUT = 6      # seconds a single HTTP request may take, so (RETRIES + 1) attempts fit in TICKER_TIMEOUT
+
+YAHOO_HOST = 'query2.finance.yahoo.com'
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `capacity` stored"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def rate_limiter(host=YAHOO_HOST):
+    """Process-wide token bucket for `host`, shared by every fetch and every session"""
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket()
+        return _buckets[host]
+
+# ============================================================================
+# CONCURRENT FETCH
+# ============================================================================
+
+def fetch_with_retry(fetch_one, ticker, host=YAHOO_HOST, retries=RETRIES, backoff=BACKOFF_SECONDS):
+    """Call fetch_one(ticker) under the host's rate limit, retrying on errors or empty results"""
+    for attempt in range(retries + 1):
+        rate_limiter(host).acquire()
+        try:
+            result = fetch_one(ticker)
+            if result is not None and not getattr(result, 'empty', False):
+                return result
+        except Exception as exc:
+            logger.warning("Fetch failed for %s (attempt %d): %s", ticker, attempt + 1, exc)
+        if attempt < retries:
+            METRICS.inc('fetch_retries_total')
+            time.sleep(random.uniform(0, backoff * 2 ** attempt))
+    return None
+
+
+def fetch_concurrently(tickers, fetch_one, max_workers=MAX_WORKERS, timeout=TICKER_TIMEOUT, host=YAHOO_HOST):
+    """Fetch independent tickers in parallel.
+
+    Returns {ticker: result} for tickers that succeeded. Tickers that keep
+    failing, or are still running `timeout` seconds after a worker picked
+    them up, are left out, so one slow ticker can't stall the whole refresh.
+    fetch_one should bound its own requests (the providers pass
+    REQUEST_TIMEOUT to every download), so an abandoned worker finishes and
+    frees up on its own.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+
+    started = {}
+
+    def run(ticker):
+        started[ticker] = time.monotonic()
+        return fetch_with_retry(fetch_one, ticker, host)
+
+    workers = min(max_workers, len(tickers))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sphaera-fetch')
+    futures = {pool.submit(run, ticker): ticker for ticker in tickers}
+
+    # Each ticker's clock starts when a worker picks it up. Tickers still queued
+    # once every batch could have used its full timeout are dropped.
+    give_up = time.monotonic() + timeout * -(-len(tickers) // workers)
+    pending, done, timed_out = set(futures), set(), set()
+    while pending:
+        now = time.monotonic()
+        deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+        if len(deadlines) < len(pending):
+            deadlines.append(now + 0.05)    # poll for queued tickers starting
+        if now < give_up:
+            deadlines.append(give_up)       # once past, only started tickers' deadlines are left to wait for
+        finished, pending = wait(pending, timeout=max(min(deadlines) - now, 0), return_when=FIRST_COMPLETED)
+        done |= finished
+
+        now = time.monotonic()
+        late = {f for f in pending if futures[f] in started and now - started[futures[f]] > timeout}
+        if now >= give_up:
+            late |= {f for f in pending if f.cancel()}
+        timed_out |= late
+        pending -= late
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for future in timed_out:
+        logger.warning("Fetch timed out for %s", futures[future])
+    METRICS.inc('fetch_timeouts_total', len(timed_out))
+
+    results = {}
+    for future in done:
+        result = future.result()
+        if result is not None:
+            results[futures[future]] = result
+    return results
@@ -0,0 +1,34 @@
+"""
+SPHAERA FILE CACHE
+Parsed contents of small data files (the universe, macro inputs, local
+prices), kept in memory and re-read only when a file's modification time changes
+"""
+
+import os
+import threading
+
+
+class FileCache:
+    """load(path) per path, re-run only when the file at path has a new mtime.
+
+    The file is read outside the lock, so callers of other files never wait
+    on a slow parse; two callers racing on a changed file may both read it,
+    and either result is cached.
+    """
+
+    def __init__(self, load):
+        self.load = load
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def get(self, path):
+        """Contents of path, as load(path) returned them when the file last changed"""
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._loaded.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        value = self.load(path)
+        with self._lock:
+            self._loaded[path] = (mtime, value)
+        return value
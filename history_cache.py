@@ -0,0 +1,173 @@
+"""
+SPHAERA HISTORY CACHE
+Memory-bounded Close history in front of the price store: compact float32
+entries per ticker, least recently used tickers evicted first
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRICS
+
+# In-memory budget for cached history; the least recently used tickers go first
+HISTORY_CACHE_MB = float(os.environ.get('SPHAERA_HISTORY_CACHE_MB', 64))
+
+
+def _days(dates):
+    """Dates as int32 days since 1970-01-01"""
+    return pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+
+class HistoryCache:
+    """Read-through cache of PriceStore.load, held to `budget_bytes`.
+
+    Only Close is kept: per ticker, int32 day numbers and float32 prices
+    (8 bytes a bar, ~7 significant digits - ample for 2-decimal prices and
+    returns), covering every bar from the earliest start asked for. A
+    drop-in for the store: loads come from memory, saves go through to the
+    store and patch the cached tickers in place. A write by another process
+    (e.g. export_snapshot.py) changes the store's modification time and
+    clears the cache. A store read that a write overtook is served but not
+    cached, so the cache never holds bars older than the store's.
+    """
+
+    def __init__(self, store, budget_bytes=HISTORY_CACHE_MB * 2 ** 20):
+        self.store = store
+        self.budget_bytes = int(budget_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # ticker -> (first day covered, days, closes), oldest use first
+        self._nbytes = 0
+        self._modified_at = store.modified_at()
+        self._generation = 0    # bumped by every save and clear
+        self.hits = self.misses = self.evictions = 0
+
+    # Store methods that don't read history pass straight through
+    def tickers(self):
+        return self.store.tickers()
+
+    def modified_at(self):
+        return self.store.modified_at()
+
+    def last_dates(self, tickers):
+        return self.store.last_dates(tickers)
+
+    def load(self, tickers, start=None):
+        """Wide float32 Close frame (dates x tickers) from `start` onwards, like PriceStore.load"""
+        tickers = list(tickers)
+        if not tickers:
+            return pd.DataFrame()
+        first_day = _days([pd.Timestamp(start or '1900-01-01')])[0]
+
+        with self._lock:
+            if self.store.modified_at() != self._modified_at:
+                self._clear()
+            generation = self._generation
+            entries = {}
+            for ticker in tickers:
+                entry = self._entries.get(ticker)
+                if entry is not None and entry[0] <= first_day:
+                    self._entries.move_to_end(ticker)
+                    entries[ticker] = entry
+        missing = [ticker for ticker in tickers if ticker not in entries]
+        self._count(len(entries), len(missing))
+
+        if missing:
+            close = self.store.load(missing, start)
+            with self._lock:
+                # A save here or a write elsewhere during the read may have newer bars than it
+                current = generation == self._generation and self.store.modified_at() == self._modified_at
+                for ticker in missing:
+                    bars = close[ticker].dropna()
+                    entries[ticker] = (first_day, _days(bars.index), bars.to_numpy(dtype=np.float32))
+                    if current:
+                        self._put(ticker, entries[ticker])
+
+        return self._frame(tickers, entries, first_day)
+
+    def save(self, close):
+        """Upsert bars into the store (see PriceStore.save) and into any cached tickers"""
+        written = self.store.save(close)
+        with self._lock:
+            for ticker in close.columns.intersection(list(self._entries)):
+                bars = close[ticker].dropna()
+                if not bars.empty:
+                    self._put(ticker, self._merge(self._entries[ticker], bars))
+            self._modified_at = self.store.modified_at()
+            self._generation += 1
+        return written
+
+    def footprint(self):
+        """Memory held and cache effectiveness, for the diagnostics panel"""
+        with self._lock:
+            return {
+                'tickers': len(self._entries),
+                'bars': sum(len(days) for _, days, _ in self._entries.values()),
+                'mb': round(self._nbytes / 2 ** 20, 2),
+                'budget_mb': round(self.budget_bytes / 2 ** 20, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    # ------------------------------------------------------------------------
+    # Internals (called with the lock held, except _count and _frame)
+    # ------------------------------------------------------------------------
+
+    def _put(self, ticker, entry):
+        old = self._entries.pop(ticker, None)
+        if old is not None:
+            self._nbytes -= old[1].nbytes + old[2].nbytes
+        self._entries[ticker] = entry
+        self._nbytes += entry[1].nbytes + entry[2].nbytes
+
+        # Always keep the entry just stored, even if it alone is over budget
+        while self._nbytes > self.budget_bytes and len(self._entries) > 1:
+            _, (_, days, closes) = self._entries.popitem(last=False)
+            self._nbytes -= days.nbytes + closes.nbytes
+            self.evictions += 1
+            METRICS.inc('cache_evictions_total', cache='history')
+
+    def _clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+        self._modified_at = self.store.modified_at()
+        self._generation += 1
+
+    @staticmethod
+    def _merge(entry, bars):
+        """Entry with new bars added; a new bar replaces a cached one on the same day"""
+        first_day, days, closes = entry
+        days = np.concatenate([days, _days(bars.index)])
+        closes = np.concatenate([closes, bars.to_numpy(dtype=np.float32)])
+        order = np.argsort(days, kind='stable')   # stable: on equal days the new bar sorts last
+        days, closes = days[order], closes[order]
+        last = np.append(days[1:] != days[:-1], True)
+        return first_day, days[last], closes[last]
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        METRICS.inc('cache_hits_total', hits, cache='history')
+        METRICS.inc('cache_misses_total', misses, cache='history')
+
+    @staticmethod
+    def _frame(tickers, entries, first_day):
+        """Assemble the wide frame over the union of the tickers' dates"""
+        selected = []
+        for ticker in tickers:
+            _, days, closes = entries[ticker]
+            keep = days.searchsorted(first_day)
+            selected.append((days[keep:], closes[keep:]))
+
+        all_days = np.unique(np.concatenate([days for days, _ in selected]))
+        values = np.full((len(all_days), len(tickers)), np.nan, dtype=np.float32)
+        for col, (days, closes) in enumerate(selected):
+            values[all_days.searchsorted(days), col] = closes
+
+        index = pd.DatetimeIndex(all_days.astype('datetime64[D]').astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame(values, index=index, columns=pd.Index(tickers, name='Ticker'))
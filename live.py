@@ -0,0 +1,160 @@
+"""
+SPHAERA LIVE QUOTES
+Opt-in intraday mode: the latest quotes, polled on a short interval and applied
+to the published snapshot row by row instead of rebuilding the table
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+from market_data import (
+    HORIZONS, PERF_COLUMNS, LOCAL_COLUMNS, FX_CONTRIBUTION_COLUMNS, STALE_AFTER,
+    download_quotes, fx_decomposition, history_start, market_tickers, quote_bases,
+)
+from metrics import timed
+from snapshot import MarketSnapshot, SnapshotCache
+
+# Quote poll interval in live mode. Polls are shared by every session viewing a
+# region, so a room full of screens costs one request per region per interval.
+LIVE_SECONDS = int(os.environ.get('SPHAERA_LIVE_SECONDS', 15))
+
+
+class LiveBoard:
+    """One snapshot's dashboard table, kept current from intraday quotes.
+
+    Every horizon's base price is looked up once, for quotes dated today, so
+    a quote's returns are a division. Applying quotes only touches the rows
+    whose index or currency actually moved - their Price, returns, FX 1M %,
+    currency decomposition, As Of and Stale - and the published table is
+    never mutated: a change is a new snapshot.
+    """
+
+    def __init__(self, snapshot, markets, close, today=None):
+        self.base = snapshot
+        self.today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+        self.bases = quote_bases(close, self.today)
+
+        # Last price and its date per ticker, as the snapshot was built
+        close = close.sort_index()
+        self.prices = close.ffill().iloc[-1].astype(float) if len(close) else pd.Series(float('nan'), index=close.columns)
+        self.as_of = pd.Series({ticker: close[ticker].last_valid_index() for ticker in close.columns}, dtype='datetime64[ns]')
+
+        data = snapshot.data
+        self.currencies = data['Country'].map(lambda country: markets.get(country, {}).get('currency', 'N/A')).to_numpy()
+        self._index_rows = data.groupby('Index').indices
+        self._fx_rows = pd.Series(range(len(data))).groupby(self.currencies).indices
+
+        self._lock = threading.Lock()
+        self._quotes_version = None
+        self._ticks = 0
+        self._index_ticks = 0
+        self.snapshot = snapshot
+        self.summary_version = snapshot.version
+
+    def apply(self, quotes):
+        """Apply a quote snapshot (from live_quotes); returns (snapshot, summary_version).
+
+        summary_version only changes when index returns did, so summary
+        metrics are recomputed for equity moves but not for FX-only ticks.
+        """
+        with self._lock:
+            if quotes is None or quotes.version == self._quotes_version:
+                return self.snapshot, self.summary_version
+            self._quotes_version = quotes.version
+
+            with timed('live_apply'):
+                today = quotes.data[quotes.data['Date'] == self.today]['Price']
+                today = today[today.index.isin(self.prices.index)]
+                moved = today.index[today.ne(self.prices.reindex(today.index))]
+                if moved.empty:
+                    return self.snapshot, self.summary_version
+                self.prices[moved] = today[moved]
+                self.as_of[moved] = self.today
+
+                index_rows = sorted({row for ticker in moved for row in self._index_rows.get(ticker, ())})
+                fx_rows = sorted({row for ticker in moved for row in self._fx_rows.get(ticker, ())})
+                data = self.snapshot.data.copy()
+                columns = data.columns.get_loc
+
+                if index_rows:
+                    tickers = data['Index'].iloc[index_rows].to_numpy()
+                    price = self.prices[tickers].to_numpy()
+                    usd = (price / self.bases.loc[tickers, list(HORIZONS)].to_numpy().T - 1) * 100   # horizons x rows
+                    data.iloc[index_rows, columns('Price')] = price.round(2)
+                    data.iloc[index_rows, [columns(col) for col in PERF_COLUMNS]] = usd.T.round(2)
+
+                    # Both legs of the currency decomposition are measured over the index's
+                    # window, so it only moves when the index has a bar today
+                    currencies = self.currencies[index_rows]
+                    fx = (self.prices.reindex(currencies).to_numpy() / self.bases.reindex(currencies).to_numpy().T - 1) * 100
+                    local, fx_contribution = fx_decomposition(usd, fx)
+                    data.iloc[index_rows, [columns(col) for col in LOCAL_COLUMNS]] = local.T.round(2)
+                    data.iloc[index_rows, [columns(col) for col in FX_CONTRIBUTION_COLUMNS]] = fx_contribution.T.round(2)
+                    self._index_ticks += 1
+
+                if fx_rows:
+                    currencies = self.currencies[fx_rows]
+                    change = self.prices[currencies].to_numpy() / self.bases.loc[currencies, '1M'].to_numpy() - 1
+                    data.iloc[fx_rows, columns('FX 1M %')] = (change * 100).round(2)
+
+                rows = sorted(set(index_rows) | set(fx_rows))
+                # Freshness of the touched rows, with the same rules as build_dashboard_data
+                index_as_of = self.as_of.reindex(data['Index'].iloc[rows]).to_numpy()
+                fx_as_of = self.as_of.reindex(self.currencies[rows]).to_numpy()
+                has_index = (data['Index'].iloc[rows] != 'N/A').to_numpy()
+                data.iloc[rows, columns('As Of')] = pd.DataFrame({
+                    'index': pd.Series(index_as_of).where(has_index),
+                    'fx': fx_as_of,
+                }).min(axis=1).to_numpy()
+                data.iloc[rows, columns('Stale')] = (has_index & ~self._fresh(index_as_of)) | ~self._fresh(fx_as_of)
+
+                self._ticks += 1
+                self.snapshot = MarketSnapshot((self.base.version, 'live', self._ticks), quotes.updated_at, data)
+                self.summary_version = (self.base.version, 'live', self._index_ticks)
+                return self.snapshot, self.summary_version
+
+    def _fresh(self, as_of):
+        as_of = pd.DatetimeIndex(as_of)
+        return as_of.notna() & ((self.today - as_of) <= STALE_AFTER)
+
+
+def live_quotes(markets):
+    """SnapshotCache of the latest quotes for markets() (a callable, re-read every poll), loaded single-flight"""
+    return SnapshotCache(lambda: download_quotes(market_tickers(markets())))
+
+
+class LiveFeed:
+    """Live mode for one region: its shared quote cache and a LiveBoard over its latest snapshot.
+
+    The board is rebuilt (bases re-read from the local price store) only
+    when the region's refresher publishes a new snapshot.
+    """
+
+    def __init__(self, snapshots, store, markets):
+        self.snapshots = snapshots
+        self.store = store
+        self.markets = markets
+        self.quotes = live_quotes(markets)
+        self._lock = threading.Lock()
+        self._board = None
+
+    def board(self):
+        """LiveBoard for the region's current snapshot, or None before it has one"""
+        snapshot = self.snapshots.current()
+        if snapshot is None:
+            return None
+        with self._lock:
+            if self._board is None or self._board.base is not snapshot:
+                markets = self.markets()
+                close = self.store.load(market_tickers(markets), history_start())
+                self._board = LiveBoard(snapshot, markets, close)
+            return self._board
+
+    def current(self, timeout=None):
+        """(snapshot, summary_version) with the latest quotes applied; quotes older than LIVE_SECONDS are re-polled in the background"""
+        board = self.board()
+        if board is None:
+            return None
+        return board.apply(self.quotes.get(timeout=timeout, max_age=LIVE_SECONDS))
@@ -0,0 +1,175 @@
+"""
+SPHAERA MACRO STORE
+Append-only, date-indexed manual macro inputs (10Y yield, policy rate,
+inflation) per country, with vectorized as-of levels and changes.
+
+    python macro_store.py add Brazil yield_10y=13.6 policy_rate=15 --date 2026-11-03
+    python macro_store.py show Brazil
+"""
+
+import argparse
+import csv
+import os
+import sys
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from file_cache import FileCache
+from metrics import timed
+
+MACRO_FILE = os.environ.get(
+    'SPHAERA_MACRO_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'macro.csv')
+)
+
+FIELDS = ['yield_10y', 'policy_rate', 'inflation']
+COLUMNS = ['date', 'country', 'field', 'value']
+
+# Change windows for Yield / Real Rate / Term Premium
+WINDOWS = {
+    '1W': pd.DateOffset(weeks=1),
+    '1M': pd.DateOffset(months=1),
+    '3M': pd.DateOffset(months=3),
+}
+MEASURES = ['Yield', 'Real Rate', 'Term Premium']
+CHANGE_COLUMNS = [f'{measure} Δ {window}' for measure in MEASURES for window in WINDOWS]
+
+
+class MacroError(ValueError):
+    """Malformed macro observations"""
+
+
+class MacroHistory:
+    """Every observation as a forward-filled (field x date x country) array.
+
+    Observations are appended, never edited: a later row for the same
+    country, field and date supersedes the earlier one, and a value holds
+    until the next observation. Looking a date up is one searchsorted.
+    """
+
+    def __init__(self, observations):
+        self.observations = observations
+        wide = observations.pivot_table(index='date', columns=['field', 'country'], values='value', aggfunc='last')
+        self.dates = wide.index
+        self.countries = wide.columns.get_level_values('country').unique()
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([FIELDS, self.countries])).ffill()
+        self.values = wide.to_numpy(dtype=float).reshape(len(self.dates), len(FIELDS), len(self.countries)).transpose(1, 0, 2)
+
+    def as_of(self, dates, countries):
+        """(field x date x country) array of the values in force on each date (NaN before the first)"""
+        if self.dates.empty:
+            return np.full((len(FIELDS), len(dates), len(countries)), np.nan)
+        rows = self.dates.searchsorted(pd.DatetimeIndex(dates), side='right') - 1
+        cols = self.countries.get_indexer(countries)
+        out = self.values[:, rows.clip(0)][:, :, cols.clip(0)]
+        out[:, rows < 0, :] = np.nan
+        out[:, :, cols < 0] = np.nan
+        return out
+
+    @timed('macro_table')
+    def table(self, countries, now=None):
+        """Levels as of `now` plus Yield / Real Rate / Term Premium changes over every WINDOWS horizon"""
+        now = pd.Timestamp(now or pd.Timestamp.today()).normalize()
+        queries = [now] + [now - offset for offset in WINDOWS.values()]
+        yield_10y, policy_rate, inflation = self.as_of(queries, countries)
+
+        measures = {
+            'Yield': yield_10y,
+            'Real Rate': policy_rate - inflation,
+            'Term Premium': yield_10y - policy_rate,
+        }
+        df = pd.DataFrame({
+            '10Y Yield': yield_10y[0],
+            'Inflation': inflation[0],
+            'Real Rate': measures['Real Rate'][0],
+            'Policy Rate': policy_rate[0],
+            'Term Premium': measures['Term Premium'][0].round(1),
+        }, index=countries)
+        for measure in MEASURES:
+            for i, window in enumerate(WINDOWS, start=1):
+                df[f'{measure} Δ {window}'] = measures[measure][0] - measures[measure][i]
+        return df
+
+
+class MacroStore:
+    """Macro observations in an append-only CSV (date, country, field, value).
+
+    Updating an input is an append - of a new date, or of a correction for
+    an existing one - never a code change.
+    """
+
+    def __init__(self, path=MACRO_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = FileCache(lambda path: MacroHistory(read_observations(path)))
+
+    def history(self):
+        """MacroHistory of the file, re-read only when it has changed"""
+        return self._files.get(self.path)
+
+    def append(self, country, values, on=None):
+        """Append {field: value} observations for one country, dated `on` (default today)"""
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise MacroError(f"Unknown macro fields {sorted(unknown)}; expected {FIELDS}")
+        on = pd.Timestamp(on or date.today()).date().isoformat()
+        rows = [[on, country, field, float(value)] for field, value in values.items()]
+
+        new_file = not os.path.exists(self.path)
+        with self._lock, open(self.path, 'a', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            if new_file:
+                writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+
+
+def read_observations(path):
+    """Validated observations, in file (= append) order"""
+    raw = pd.read_csv(path, dtype=str, skipinitialspace=True)
+    missing = [col for col in COLUMNS if col not in raw.columns]
+    if missing:
+        raise MacroError(f"{path}: missing columns {missing}")
+
+    observations = pd.DataFrame({
+        'date': pd.to_datetime(raw['date'], errors='coerce'),
+        'country': raw['country'].str.strip(),
+        'field': raw['field'].str.strip(),
+        'value': pd.to_numeric(raw['value'], errors='coerce'),
+    })
+    bad = observations.isna().any(axis=1) | ~observations['field'].isin(FIELDS)
+    if bad.any():
+        lines = [int(i) + 2 for i in observations.index[bad]]  # +2: header line, 1-based
+        raise MacroError(f"{path}: bad observations on lines {lines}")
+    return observations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append or inspect manual macro inputs")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="append observations, e.g. yield_10y=13.6 inflation=4.2")
+    add.add_argument('country')
+    add.add_argument('values', nargs='+', metavar='FIELD=VALUE')
+    add.add_argument('--date', help="observation date (default today)")
+
+    show = commands.add_parser('show', help="print a country's observations")
+    show.add_argument('country')
+
+    args = parser.parse_args()
+    store = MacroStore()
+
+    if args.command == 'add':
+        values = dict(item.split('=', 1) for item in args.values)
+        print(f"Appended {store.append(args.country, values, args.date)} observations to {store.path}")
+    else:
+        observations = store.history().observations
+        rows = observations[observations['country'] == args.country]
+        print(rows.pivot_table(index='date', columns='field', values='value', aggfunc='last').to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
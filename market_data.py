@@ -0,0 +1,351 @@
+"""
+SPHAERA MARKET DATA
+Batched price history loading and vectorized returns
+"""
+
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from macro_store import CHANGE_COLUMNS
+from metrics import METRICS, timed
+from providers import build_provider
+
+logger = logging.getLogger(__name__)
+
+# A bit over a year of daily bars, so the 1Y and YTD horizons always have a base price
+HISTORY_DAYS = 400
+
+# A ticker whose last bar is older than this is flagged stale (covers weekends + a holiday)
+STALE_AFTER = pd.Timedelta(days=4)
+
+# Where history and quotes come from (see providers.py): built from
+# SPHAERA_PROVIDERS on first use, or set directly (benchmarks/ do)
+provider = None
+
+# When each lagging ticker was last topped up: {(store path, ticker): Timestamp}.
+# Kept in memory, not the store, so an attempt that finds nothing isn't a write.
+_lagging_attempts = {}
+_lagging_lock = threading.Lock()
+
+# ============================================================================
+# HISTORY DOWNLOAD
+# ============================================================================
+
+def market_tickers(markets):
+    """Unique index + currency tickers in the universe, skipping 'N/A' placeholders"""
+    tickers = []
+    for info in markets.values():
+        for ticker in (info['index'], info['currency']):
+            if ticker != 'N/A' and ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def _provider():
+    """The configured market data provider, built on first use"""
+    global provider
+    if provider is None:
+        provider = build_provider()
+    return provider
+
+
+def history_start(days=HISTORY_DAYS):
+    """First date of the history window the dashboard works with"""
+    return pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
+
+
+def download_history(tickers, start=None):
+    """Daily Close history for all tickers as ONE batch request to the provider.
+
+    Returns a wide DataFrame (dates x tickers); tickers no source had data
+    for are all-NaN columns so lookups never raise KeyError.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return pd.DataFrame()
+    start = pd.Timestamp(start if start is not None else history_start())
+    return _provider().history(tickers, start)
+
+
+@timed('download_quotes')
+def download_quotes(tickers):
+    """Latest intraday print per ticker: a ticker-indexed frame of 'Price' and the 'Date' of the print.
+
+    Tickers with no print (or a provider with no intraday data) are left out.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return pd.DataFrame(columns=['Price', 'Date'])
+    return _provider().quotes(tickers)
+
+
+@timed('refresh_history')
+def refresh_history(store, tickers, days=HISTORY_DAYS):
+    """Top up the on-disk store and return the history window for `tickers`.
+
+    Tickers already in the store only download bars from their last stored
+    date onwards (the last bar is re-fetched because it may have been an
+    intraday print). Tickers with no history get the full window. Tickers
+    lagging the freshest one by more than STALE_AFTER (halted, delisted or
+    failing) are topped up in a request of their own, so they don't pull
+    everyone else's download back to their last date, and only once
+    STALE_AFTER has passed since their last attempt, so a dead ticker
+    doesn't re-request the same empty window on every refresh. Each group
+    is still a single batched request.
+
+    If a download fails we still return what the store has, so every ticker
+    keeps its last good history (flagged stale later by its 'As Of' date).
+    """
+    tickers = list(tickers)
+    start = history_start(days)
+    last_dates = store.last_dates(tickers)
+
+    new_tickers = [t for t in tickers if t not in last_dates]
+    stored_tickers = [t for t in tickers if t in last_dates]
+
+    try:
+        if new_tickers:
+            METRICS.inc('store_rows_written_total', store.save(download_history(new_tickers, start)))
+        if stored_tickers:
+            newest = max(last_dates[t] for t in stored_tickers)
+            current = [t for t in stored_tickers if newest - last_dates[t] <= STALE_AFTER]
+            lagging = [t for t in stored_tickers if newest - last_dates[t] > STALE_AFTER]
+            now = pd.Timestamp.now()
+            with _lagging_lock:
+                attempted = {t: _lagging_attempts.get((store.path, t)) for t in lagging}
+            due = [t for t in lagging if attempted[t] is None or now - attempted[t] >= STALE_AFTER]
+            METRICS.inc('lagging_skipped_total', len(lagging) - len(due))
+            for group in (current, due):
+                if group:
+                    top_up_start = max(min(last_dates[t] for t in group), start)
+                    METRICS.inc('store_rows_written_total', store.save(download_history(group, top_up_start)))
+            with _lagging_lock:
+                _lagging_attempts.update({(store.path, t): now for t in due})
+    except Exception:
+        logger.exception("History download failed; serving last stored bars")
+        METRICS.inc('refresh_failures_total')
+
+    return store.load(tickers, start)
+
+# ============================================================================
+# RETURNS ENGINE (all tickers x all horizons in one vectorized pass)
+# ============================================================================
+
+# Calendar offsets measured back from each ticker's own latest bar.
+# None = YTD, which is measured from the prior year-end close.
+HORIZONS = {
+    '1W': pd.DateOffset(weeks=1),
+    '1M': pd.DateOffset(months=1),
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    'YTD': None,
+    '1Y': pd.DateOffset(years=1),
+}
+
+
+def _horizon_positions(dates, last_date):
+    """(horizons x tickers) row of each horizon's base bar: the last date on or before its cutoff back from last_date (-1 if none)"""
+    positions = []
+    for offset in HORIZONS.values():
+        if offset is None:
+            cutoff = last_date.to_period('Y').start_time - pd.Timedelta(days=1)
+        else:
+            cutoff = last_date - offset
+        positions.append(dates.searchsorted(cutoff, side='right') - 1)
+    return np.array(positions).reshape(len(HORIZONS), len(last_date))
+
+
+def _horizon_bases(dates, filled, last_date):
+    """{horizon: base price per ticker} - the last close on or before each cutoff back from last_date"""
+    positions = _horizon_positions(dates, last_date)
+    cols = np.arange(filled.shape[1])
+    return {
+        horizon: np.where(base_pos >= 0, filled[np.maximum(base_pos, 0), cols], np.nan)
+        for horizon, base_pos in zip(HORIZONS, positions)
+    }
+
+
+def quote_bases(close, on):
+    """Base price of every horizon for quotes dated `on` (tickers x HORIZONS), so a quote's returns are one division"""
+    close = close.sort_index()
+    last_date = pd.DatetimeIndex([pd.Timestamp(on).normalize()] * len(close.columns))
+    bases = _horizon_bases(close.index, close.ffill().to_numpy(dtype=float), last_date)
+    return pd.DataFrame(bases, index=close.columns)
+
+
+@timed('returns_engine')
+def compute_returns(close, now=None):
+    """Last price and % returns for every ticker and horizon.
+
+    Takes a wide Close matrix (dates x tickers) and returns a
+    tickers x ['Price', '1W %', ..., '1Y %', 'As Of', 'Stale'] table. The base
+    price for each horizon is the last close on or before the cutoff date; if
+    history does not reach back that far the return is NaN. 'As Of' is the
+    date of the ticker's last bar and 'Stale' flags tickers whose last bar is
+    older than STALE_AFTER (or that have no data at all) as of `now`.
+    """
+    columns = ['Price'] + [f'{h} %' for h in HORIZONS] + ['As Of', 'Stale']
+    if close.empty:
+        empty = pd.DataFrame(index=close.columns, columns=columns, dtype=float)
+        empty['As Of'] = pd.NaT
+        empty['Stale'] = True
+        return empty
+
+    close = close.sort_index()
+    dates = close.index
+    values = close.to_numpy(dtype=float)
+    filled = close.ffill().to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    cols = np.arange(n_cols)
+
+    # Position of each ticker's latest valid bar (tickers trade on different calendars)
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    last_pos = n_rows - 1 - np.argmax(valid[::-1], axis=0)
+    last_price = np.where(has_data, values[last_pos, cols], np.nan)
+    last_date = dates[last_pos]
+
+    table = {'Price': last_price}
+    for horizon, base in _horizon_bases(dates, filled, last_date).items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table[f'{horizon} %'] = np.where(has_data, (last_price / base - 1) * 100, np.nan)
+
+    now = pd.Timestamp(now if now is not None else pd.Timestamp.today()).normalize()
+    table['As Of'] = last_date.where(has_data)
+    table['Stale'] = ~has_data | ((now - last_date) > STALE_AFTER)
+
+    return pd.DataFrame(table, index=close.columns)[columns]
+
+def fx_decomposition(usd, fx):
+    """(local-currency return, FX contribution) in % from USD equity returns and FX returns in %.
+
+    FX pairs are quoted local per USD, so local = (1 + usd) * (1 + fx) - 1,
+    and the FX contribution is what the currency added to the USD return:
+    usd - local. Works elementwise on arrays of any shape.
+    """
+    local = ((1 + usd / 100) * (1 + fx / 100) - 1) * 100
+    return local, usd - local
+
+
+@timed('fx_decomposition')
+def decompose_returns(close, index_tickers, fx_tickers):
+    """Local-currency return and FX contribution for every horizon (two pairs x horizons arrays, in %).
+
+    index_tickers[i] is priced in USD and fx_tickers[i] is its currency;
+    unknown or 'N/A' tickers give NaN. Both legs are measured over the same
+    dates - from the index's latest bar back to each horizon's base bar - by
+    indexing the forward-filled price matrix once per leg.
+    """
+    n = len(index_tickers)
+    if close.empty:
+        empty = np.full((len(HORIZONS), n), np.nan)
+        return empty, empty.copy()
+
+    close = close.sort_index()
+    # A trailing all-NaN row and column, so position -1 (no such ticker or base bar) reads NaN
+    filled = np.full((len(close) + 1, len(close.columns) + 1), np.nan)
+    filled[:-1, :-1] = close.ffill().to_numpy(dtype=float)
+    index_cols = close.columns.get_indexer(index_tickers)
+    fx_cols = close.columns.get_indexer(fx_tickers)
+
+    # Each index's latest bar ends the window for both legs
+    valid = close.notna().to_numpy()[:, index_cols] & (index_cols >= 0)
+    has_data = valid.any(axis=0)
+    last_pos = np.where(has_data, len(close) - 1 - np.argmax(valid[::-1], axis=0), -1)
+    base_pos = np.where(has_data, _horizon_positions(close.index, close.index[last_pos]), -1)
+
+    rows = np.vstack([last_pos, base_pos])   # (1 + horizons) x countries
+    with np.errstate(divide='ignore', invalid='ignore'):
+        usd, fx = [(filled[rows, cols][0] / filled[rows, cols][1:] - 1) * 100 for cols in (index_cols, fx_cols)]
+    return fx_decomposition(usd, fx)
+
+# ============================================================================
+# DASHBOARD TABLE
+# ============================================================================
+
+# Index return columns shown on the dashboard, in display order
+PERF_COLUMNS = [f'{h} %' for h in HORIZONS]
+
+# Index returns in local currency, and how much the currency added to the USD return
+LOCAL_COLUMNS = [f'Local {h} %' for h in HORIZONS]
+FX_CONTRIBUTION_COLUMNS = [f'FX Contrib {h} %' for h in HORIZONS]
+
+# Macro changes besides the headline 1M 'Yield Δ'
+MACRO_CHANGE_COLUMNS = [col for col in CHANGE_COLUMNS if col != 'Yield Δ 1M']
+
+
+@timed('build_table')
+def build_dashboard_data(markets, macro, close, now=None):
+    """Build the dashboard table for every country from one history frame.
+
+    Missing prices/returns are NaN (never 0.0), so a country with a failed
+    fetch keeps its row; 'As Of' is the oldest last bar among the row's index
+    and currency, and 'Stale' is set if either of them is stale. Macro
+    levels and changes are looked up as of `now` in `macro` (a MacroHistory).
+    """
+    returns = compute_returns(close, now)
+    countries = list(markets)
+    info = pd.DataFrame.from_dict(markets, orient='index')
+    rates = macro.table(countries, now)
+
+    # Align index and currency returns to countries ('N/A' tickers come back as NaN)
+    index_returns = returns.reindex(info['index']).set_axis(countries)
+    fx_returns = returns.reindex(info['currency']).set_axis(countries)
+
+    local, fx_contribution = decompose_returns(close, list(info['index']), list(info['currency']))
+
+    # 'N/A' index tickers have no data by design - only the currency decides freshness
+    has_index = info['index'] != 'N/A'
+    as_of = pd.concat([index_returns['As Of'].where(has_index), fx_returns['As Of']], axis=1).min(axis=1)
+    stale = (index_returns['Stale'].ne(False) & has_index) | fx_returns['Stale'].ne(False)
+
+    df = pd.DataFrame({
+        'Flag': info['flag'],
+        'Country': countries,
+        'Index': info['index'],
+        'Price': index_returns['Price'].round(2),
+        **{col: index_returns[col].round(2) for col in PERF_COLUMNS},
+        'FX 1M %': fx_returns['1M %'].round(2),
+        **{col: values.round(2) for col, values in zip(LOCAL_COLUMNS, local)},
+        **{col: values.round(2) for col, values in zip(FX_CONTRIBUTION_COLUMNS, fx_contribution)},
+        '10Y Yield': rates['10Y Yield'],
+        'Yield Δ': rates['Yield Δ 1M'],  # NaN without a yield a month back
+        'Inflation': rates['Inflation'],
+        'Real Rate': rates['Real Rate'],
+        'Policy Rate': rates['Policy Rate'],
+        'Term Premium': rates['Term Premium'],
+        **{col: rates[col] for col in MACRO_CHANGE_COLUMNS},
+        'As Of': as_of,
+        'Stale': stale,
+    }, index=countries)
+
+    return df.reset_index(drop=True)
+
+
+def refresh_stale_flags(df, now=None):
+    """A dashboard table built earlier with 'Stale' re-evaluated as of `now`.
+
+    Rows stale when built stay stale; fresh rows go stale once their
+    'As Of' is more than STALE_AFTER behind `now`.
+    """
+    now = pd.Timestamp(now if now is not None else pd.Timestamp.today()).normalize()
+    df = df.copy()
+    fresh = (now - pd.to_datetime(df['As Of'])) <= STALE_AFTER   # False for a missing 'As Of'
+    df['Stale'] = df['Stale'].astype(bool) | ~fresh
+    return df
+
+
+def load_dashboard_data(store, markets, macro):
+    """Top up the price store with new bars and build the dashboard table"""
+    history = refresh_history(store, market_tickers(markets))
+    return build_dashboard_data(markets, macro, history)
+
+
+def replay_dashboard_data(archive, markets, macro, as_of):
+    """The dashboard table as it stood at the close of `as_of`, from the local price archive (no network)"""
+    as_of = pd.Timestamp(as_of).normalize()
+    close = archive.window(market_tickers(markets), as_of - pd.Timedelta(days=HISTORY_DAYS), as_of)
+    return build_dashboard_data(markets, macro, close, now=as_of)
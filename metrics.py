@@ -0,0 +1,174 @@
+"""
+SPHAERA METRICS
+Process-wide latency histograms and counters for the dashboard hot paths,
+exportable as Prometheus text or structured (JSON) log records
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, milliseconds
+BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+# Recent samples kept per histogram for exact percentiles in the diagnostics panel
+RECENT_SAMPLES = 500
+
+# Set to a file path to have the refresher write Prometheus text after every refresh
+METRICS_FILE = os.environ.get('SPHAERA_METRICS_FILE')
+
+# Set to 1 to have the refresher log every metric as a JSON record after every refresh
+METRICS_LOG = os.environ.get('SPHAERA_METRICS_LOG') == '1'
+
+PREFIX = 'sphaera_'
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _label_text(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Histogram:
+    """Cumulative bucket counts + sum (Prometheus style) and a window of recent samples"""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Thread-safe named histograms and counters, each with optional labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            self.histograms.setdefault(_key(name, labels), Histogram()).observe(value)
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            key = _key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    # ------------------------------------------------------------------------
+    # Exports
+    # ------------------------------------------------------------------------
+
+    def summary(self):
+        """(histogram rows, counter rows) as lists of dicts for display"""
+        with self._lock:
+            histograms = [
+                {
+                    'metric': name,
+                    **dict(labels),
+                    'count': h.count,
+                    'mean_ms': round(h.sum / h.count, 2) if h.count else None,
+                    'p50_ms': round(float(np.percentile(h.recent, 50)), 2) if h.recent else None,
+                    'p95_ms': round(float(np.percentile(h.recent, 95)), 2) if h.recent else None,
+                    'max_ms': round(max(h.recent), 2) if h.recent else None,
+                }
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+            counters = [
+                {'metric': name, **dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        return histograms, counters
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for (hist_name, labels), h in sorted(self.histograms.items()):
+                    if hist_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS_MS, h.buckets):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else bound
+                        lines.append(f'{PREFIX}{name}_bucket{_label_text(labels, le=le)} {cumulative}')
+                    lines.append(f'{PREFIX}{name}_sum{_label_text(labels)} {h.sum:.3f}')
+                    lines.append(f'{PREFIX}{name}_count{_label_text(labels)} {h.count}')
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f'{PREFIX}{name}{_label_text(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def to_json_lines(self):
+        """One JSON record per metric, suitable for structured log shipping"""
+        histograms, counters = self.summary()
+        ts = time.time()
+        records = [{'ts': ts, 'type': 'histogram', **row} for row in histograms]
+        records += [{'ts': ts, 'type': 'counter', **row} for row in counters]
+        return '\n'.join(json.dumps(record) for record in records) + '\n'
+
+    def write_prometheus(self, path):
+        """Atomically (re)write a Prometheus textfile, e.g. for node_exporter's textfile collector"""
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def log(self):
+        """Emit the current metrics as structured log records"""
+        for line in self.to_json_lines().splitlines():
+            logger.info(line)
+
+
+METRICS = MetricsRegistry()
+
+
+class timed(ContextDecorator):
+    """Record wall-clock ms into the 'stage_ms' histogram; use as decorator or `with` block"""
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call, so concurrent calls don't share a start time
+        return timed(self.stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        METRICS.observe('stage_ms', (time.perf_counter() - self._start) * 1000, stage=self.stage)
+        return False
@@ -0,0 +1,169 @@
+"""
+SPHAERA PRICE ARCHIVE
+Memory-mapped, columnar copy of the price store for as-of-date replay
+
+    python price_archive.py build                    # (re)build from data/prices.sqlite
+    python price_archive.py replay 2026-06-30 -o note.csv
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore, DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get('SPHAERA_ARCHIVE_DIR', os.path.join(DATA_DIR, 'archive'))
+
+MANIFEST = 'manifest.json'
+
+
+class PriceArchive:
+    """Close history as .npy files, opened memory-mapped.
+
+    dates.npy is the sorted date index (datetime64[D]); close.npy is the
+    dates x tickers matrix stored column-major, so each ticker's history is
+    contiguous on disk. A window is two searchsorteds and a slice - only the
+    pages actually touched are read. Each build is a new generation
+    directory, named by the manifest.
+    """
+
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.tickers = manifest['tickers']
+        self.source_modified_at = manifest['source_modified_at']
+        arrays = os.path.join(path, manifest.get('generation', ''))
+        self.dates = np.load(os.path.join(arrays, 'dates.npy'), mmap_mode='r')
+        self.close = np.load(os.path.join(arrays, 'close.npy'), mmap_mode='r')
+        self._columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def build(cls, store, path=ARCHIVE_DIR):
+        """Write the whole price store out as a new generation, swap it in and open it"""
+        modified_at = store.modified_at()
+        close = store.load(store.tickers())
+
+        # Arrays go to a fresh directory and the manifest naming it is replaced
+        # last, so a reader opens the old generation or the new one, never a mix
+        generation = f'gen-{time.time_ns()}'
+        previous = cls._generation(path)
+        os.makedirs(os.path.join(path, generation))
+        np.save(os.path.join(path, generation, 'dates.npy'), close.index.to_numpy(dtype='datetime64[D]'))
+        np.save(os.path.join(path, generation, 'close.npy'), np.asfortranarray(close.to_numpy(dtype=float)))
+        tmp = os.path.join(path, f'{MANIFEST}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'tickers': list(close.columns), 'source_modified_at': modified_at, 'generation': generation}, f)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+        # Keep the generation just replaced, which another process may have just
+        # opened; the rest (including any a killed build left half-written) go.
+        # Archives already open keep their memory maps after the files are removed.
+        for name in os.listdir(path):
+            if name.startswith('gen-') and name not in (generation, previous):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        for name in ('dates.npy', 'close.npy'):    # arrays from before generations
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        return cls(path)
+
+    @staticmethod
+    def _generation(path):
+        """Generation the manifest at path names, if any"""
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                return json.load(f).get('generation')
+        except (OSError, ValueError):
+            return None
+
+    def window(self, tickers, start, end):
+        """Wide Close frame (dates x tickers) for start <= date <= end; unknown tickers are all-NaN"""
+        lo = self.dates.searchsorted(np.datetime64(pd.Timestamp(start).date(), 'D'), side='left')
+        hi = self.dates.searchsorted(np.datetime64(pd.Timestamp(end).date(), 'D'), side='right')
+        cols = np.array([self._columns.get(ticker, -1) for ticker in tickers], dtype=np.intp)
+        present = cols >= 0
+
+        block = np.full((hi - lo, len(cols)), np.nan)
+        block[:, present] = self.close[lo:hi, cols[present]]
+        close = pd.DataFrame(block, index=pd.DatetimeIndex(self.dates[lo:hi], name='Date'), columns=list(tickers))
+        return close.dropna(how='all')
+
+
+_opened = {}
+_rebuilding = set()
+_lock = threading.Lock()
+
+
+def _rebuild(store, path):
+    """Build a new generation and swap it in for load_archive (runs on a background thread)"""
+    try:
+        archive = PriceArchive.build(store, path)
+        with _lock:
+            _opened[path] = archive
+    except Exception:
+        logger.exception("Price archive rebuild failed; serving the previous one")
+    finally:
+        with _lock:
+            _rebuilding.discard(path)
+
+
+def load_archive(store, path=ARCHIVE_DIR):
+    """Archive at path, kept up to date with the price store.
+
+    Only a missing archive is built in the caller. Once the store has been
+    written since the archive was built, that archive is still returned
+    immediately while one rebuild at a time runs in the background and is
+    swapped in when done.
+    """
+    with _lock:
+        archive = _opened.get(path)
+        if archive is None and os.path.exists(os.path.join(path, MANIFEST)):
+            archive = _opened[path] = PriceArchive(path)
+        if archive is None:
+            archive = _opened[path] = PriceArchive.build(store, path)
+        elif archive.source_modified_at < store.modified_at() and path not in _rebuilding:
+            _rebuilding.add(path)
+            threading.Thread(target=_rebuild, args=(store, path), name='sphaera-archive', daemon=True).start()
+    return archive
+
+
+def main():
+    from macro_store import MacroStore
+    from market_data import replay_dashboard_data
+    from universe import load_universe
+
+    parser = argparse.ArgumentParser(description="Build the price archive or replay the dashboard table as of a date")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help="rebuild the archive from the price store")
+    replay = commands.add_parser('replay', help="dashboard table as of a past date, offline")
+    replay.add_argument('date')
+    replay.add_argument('-o', '--output', help="write CSV here instead of printing")
+    args = parser.parse_args()
+
+    store = PriceStore()
+    if args.command == 'build':
+        archive = PriceArchive.build(store)
+        print(f"{len(archive.tickers)} tickers x {len(archive.dates)} dates -> {archive.path}")
+        return 0
+
+    universe = load_universe()
+    df = replay_dashboard_data(load_archive(store), universe.markets, MacroStore().history(), args.date)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
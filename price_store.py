@@ -0,0 +1,91 @@
+"""
+SPHAERA PRICE STORE
+Persistent on-disk daily Close history (SQLite, one row per ticker per day)
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+DATA_DIR = os.environ.get('SPHAERA_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+DEFAULT_PATH = os.path.join(DATA_DIR, 'prices.sqlite')
+
+
+class PriceStore:
+    """Daily Close history keyed by (ticker, date).
+
+    Survives restarts and deploys, so a refresh only needs to download the
+    bars after the last stored date for each ticker.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS prices (
+                    ticker TEXT NOT NULL,
+                    date   TEXT NOT NULL,
+                    close  REAL NOT NULL,
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def tickers(self):
+        """Every ticker with stored history"""
+        with self._connect() as conn:
+            return [ticker for (ticker,) in conn.execute('SELECT DISTINCT ticker FROM prices ORDER BY ticker')]
+
+    def modified_at(self):
+        """Last write time of the database (including its WAL), or 0 if it doesn't exist yet"""
+        paths = [self.path, f'{self.path}-wal']
+        return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0)
+
+    def last_dates(self, tickers):
+        """{ticker: Timestamp of last stored bar} for tickers that have any history"""
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        placeholders = ','.join('?' * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT ticker, MAX(date) FROM prices WHERE ticker IN ({placeholders}) GROUP BY ticker',
+                tickers
+            ).fetchall()
+        return {ticker: pd.Timestamp(date) for ticker, date in rows}
+
+    def load(self, tickers, start=None):
+        """Wide Close frame (dates x tickers) from `start` onwards"""
+        tickers = list(tickers)
+        if not tickers:
+            return pd.DataFrame()
+        placeholders = ','.join('?' * len(tickers))
+        start = pd.Timestamp(start or '1900-01-01').strftime('%Y-%m-%d')
+        with self._connect() as conn:
+            rows = pd.read_sql_query(
+                f'SELECT ticker, date, close FROM prices WHERE ticker IN ({placeholders}) AND date >= ?',
+                conn, params=[*tickers, start]
+            )
+        close = rows.pivot(index='date', columns='ticker', values='close')
+        close.index = pd.DatetimeIndex(close.index, name='Date')
+        close.columns.name = 'Ticker'
+        return close.reindex(columns=tickers).sort_index()
+
+    def save(self, close):
+        """Upsert every non-NaN bar of a wide Close frame"""
+        if close.empty:
+            return 0
+        long = close.stack().dropna()
+        rows = [
+            (ticker, date.strftime('%Y-%m-%d'), float(value))
+            for (date, ticker), value in long.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)', rows)
+        return len(rows)
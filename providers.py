@@ -0,0 +1,254 @@
+"""
+SPHAERA MARKET DATA PROVIDERS
+Batch daily Close history from interchangeable sources - Yahoo Finance, a
+local CSV/Parquet file, or a priority-ordered chain that fills gaps per ticker
+
+    SPHAERA_PROVIDERS=yfinance,local   # default: Yahoo, then data/local_prices.csv for whatever it missed
+    SPHAERA_PROVIDERS=local            # offline: tests, benchmarks, outages
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from fetcher import REQUEST_TIMEOUT, fetch_concurrently, rate_limiter
+from file_cache import FileCache
+from metrics import METRICS, timed
+from price_store import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = os.environ.get('SPHAERA_PROVIDERS', 'yfinance,local')
+
+# Wide Close history: a Date column or index, then one column per ticker
+# (the format benchmarks/market_stand_in.py records)
+LOCAL_PRICES_FILE = os.environ.get('SPHAERA_LOCAL_PRICES', os.path.join(DATA_DIR, 'local_prices.csv'))
+
+QUOTE_COLUMNS = ['Price', 'Date']
+
+# yfinance takes most of a second to import, so it is only loaded on the first
+# download (a stand-in can be installed here instead, see benchmarks/)
+yf = None
+
+
+class ProviderError(ValueError):
+    """Unknown provider name or unreadable local price file"""
+
+
+def empty_history(tickers):
+    """History with a column per ticker and no dates"""
+    return pd.DataFrame(columns=list(tickers), index=pd.DatetimeIndex([], name='Date'), dtype=float)
+
+
+class Provider:
+    """One source of daily Close history.
+
+    history() returns a wide frame (dates x tickers) for start <= date < end
+    with a column for every requested ticker - all-NaN where the source has
+    nothing - so callers never KeyError. quotes() returns the latest intraday
+    print per ticker; sources without intraday data return none.
+    """
+
+    name = 'provider'
+
+    def history(self, tickers, start, end=None):
+        raise NotImplementedError
+
+    def quotes(self, tickers):
+        return pd.DataFrame(columns=QUOTE_COLUMNS, index=pd.Index([], name='Ticker'))
+
+# ============================================================================
+# YAHOO FINANCE
+# ============================================================================
+
+def _yfinance():
+    """The yfinance module (or installed stand-in), imported on first use"""
+    global yf
+    if yf is None:
+        import yfinance
+        yf = yfinance
+    return yf
+
+
+def _close(data, tickers):
+    """Close columns of a yf.download result, flattened for a single ticker on older yfinance"""
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(name=tickers[0])
+    close = close.reindex(columns=tickers)
+    close.index = pd.DatetimeIndex(close.index).tz_localize(None)
+    return close
+
+
+class YFinanceProvider(Provider):
+    """Yahoo Finance: one batched download, then per-ticker retries on the concurrent fetch pool"""
+
+    name = 'yfinance'
+
+    def _download(self, tickers, start, end):
+        """One yf.download call -> wide Close frame (dates x requested tickers)"""
+        with timed('download'):
+            data = _yfinance().download(tickers, start=start, end=end, progress=False, threads=True, timeout=REQUEST_TIMEOUT)
+        METRICS.inc('download_requests_total')
+        # In-memory size of what came back - a proxy for bytes over the wire
+        METRICS.inc('download_bytes_total', int(data.memory_usage(deep=True).sum()))
+        if data.empty:
+            return empty_history(tickers)
+        return _close(data, tickers).sort_index().dropna(how='all')
+
+    def history(self, tickers, start, end=None):
+        """Tickers missing from the batch (throttled or transient errors) are retried individually"""
+        tickers = list(tickers)
+        start = pd.Timestamp(start).strftime('%Y-%m-%d')
+        end = pd.Timestamp(end).strftime('%Y-%m-%d') if end is not None else None
+
+        rate_limiter().acquire()
+        close = self._download(tickers, start, end)
+
+        missing = [t for t in tickers if close[t].isna().all()]
+        if missing:
+            retried = fetch_concurrently(missing, lambda ticker: self._download([ticker], start, end))
+            if retried:
+                close = close.combine_first(pd.concat(retried.values(), axis=1))
+            METRICS.inc('fetch_failures_total', len(missing) - len(retried))
+
+        return close.reindex(columns=tickers).dropna(how='all')
+
+    def quotes(self, tickers):
+        """Latest print per ticker from today's 1-minute bars, one batched request, no retries"""
+        tickers = list(tickers)
+        rate_limiter().acquire()
+        data = _yfinance().download(tickers, period='1d', interval='1m', progress=False, threads=True, timeout=REQUEST_TIMEOUT)
+        METRICS.inc('download_requests_total')
+        METRICS.inc('download_bytes_total', int(data.memory_usage(deep=True).sum()))
+        if data.empty:
+            return super().quotes(tickers)
+
+        close = _close(data, tickers)
+        valid = close.notna().to_numpy()
+        last_pos = len(close) - 1 - np.argmax(valid[::-1], axis=0)
+        quotes = pd.DataFrame({
+            'Price': close.to_numpy()[last_pos, np.arange(len(tickers))],
+            'Date': close.index[last_pos].normalize(),
+        }, index=pd.Index(tickers, name='Ticker'))
+        return quotes[valid.any(axis=0)]
+
+# ============================================================================
+# LOCAL FILE
+# ============================================================================
+
+class LocalFileProvider(Provider):
+    """Close history from a wide CSV or Parquet file (by extension), re-read only when it changes.
+
+    No network and no rate limit, so a build runs at disk speed. A missing
+    file simply has no data. Tickers need not exist on Yahoo: a country with
+    no Yahoo index can point its universe entry at a column here.
+    """
+
+    name = 'local'
+
+    def __init__(self, path=LOCAL_PRICES_FILE):
+        self.path = path
+        self._files = FileCache(self._parse)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return empty_history([])
+        return self._files.get(self.path)
+
+    def _parse(self, path):
+        if path.endswith('.parquet'):
+            close = pd.read_parquet(path)
+        else:
+            close = pd.read_csv(path)
+        if 'Date' in close.columns:
+            close = close.set_index('Date')
+        elif not isinstance(close.index, pd.DatetimeIndex):
+            close = close.set_index(close.columns[0])
+        try:
+            close.index = pd.DatetimeIndex(pd.to_datetime(close.index), name='Date').tz_localize(None)
+            close = close.apply(pd.to_numeric, errors='coerce').sort_index()
+        except (ValueError, TypeError) as exc:
+            raise ProviderError(f"{path}: expected a Date column and one numeric column per ticker ({exc})")
+        close.columns = close.columns.astype(str)
+        return close
+
+    def history(self, tickers, start, end=None):
+        close = self._read()
+        rows = close.index >= pd.Timestamp(start)
+        if end is not None:
+            rows &= close.index < pd.Timestamp(end)
+        return close[rows].reindex(columns=list(tickers)).dropna(how='all')
+
+# ============================================================================
+# FALLBACK CHAIN
+# ============================================================================
+
+class FallbackProvider(Provider):
+    """Providers in priority order, each only asked for the tickers all earlier ones had nothing for.
+
+    A provider that raises is logged and skipped, so an outage at the head
+    of the chain falls through to the next source for every ticker.
+    """
+
+    name = 'fallback'
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+
+    def _chain(self, tickers, fetch, has_data):
+        results = []
+        missing = list(tickers)
+        for provider in self.providers:
+            if not missing:
+                break
+            try:
+                result = fetch(provider, missing)
+            except Exception:
+                logger.exception("%s provider failed; falling back", provider.name)
+                METRICS.inc('provider_failures_total', provider=provider.name)
+                continue
+            filled = [ticker for ticker in missing if has_data(result, ticker)]
+            METRICS.inc('provider_tickers_total', len(filled), provider=provider.name)
+            results.append((result, filled))
+            missing = [ticker for ticker in missing if ticker not in filled]
+        return results
+
+    def history(self, tickers, start, end=None):
+        tickers = list(tickers)
+        results = self._chain(
+            tickers,
+            lambda provider, missing: provider.history(missing, start, end),
+            lambda close, ticker: ticker in close.columns and close[ticker].notna().any(),
+        )
+        parts = [close[filled] for close, filled in results if filled]
+        if not parts:
+            return empty_history(tickers)
+        return pd.concat(parts, axis=1).reindex(columns=tickers).sort_index().dropna(how='all')
+
+    def quotes(self, tickers):
+        results = self._chain(
+            tickers,
+            lambda provider, missing: provider.quotes(missing),
+            lambda quotes, ticker: ticker in quotes.index,
+        )
+        parts = [quotes.loc[filled] for quotes, filled in results if filled]
+        return pd.concat(parts) if parts else super().quotes(tickers)
+
+
+PROVIDER_TYPES = {
+    'yfinance': YFinanceProvider,
+    'local': LocalFileProvider,
+}
+
+
+def build_provider(names=PROVIDERS):
+    """Provider for a comma-separated, priority-ordered list of PROVIDER_TYPES names"""
+    names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PROVIDER_TYPES]
+    if unknown or not names:
+        raise ProviderError(f"Unknown market data providers {unknown or names}; expected some of {list(PROVIDER_TYPES)}")
+    providers = [PROVIDER_TYPES[name]() for name in names]
+    return providers[0] if len(providers) == 1 else FallbackProvider(providers)
@@ -0,0 +1,47 @@
+"""
+SPHAERA BACKGROUND REFRESHER
+Keeps market data current on a schedule, independent of Streamlit reruns
+"""
+
+import threading
+
+from metrics import METRICS, METRICS_FILE, METRICS_LOG
+
+# Matches the "Updates: Every 5 minutes" promise in the footer
+REFRESH_SECONDS = 300
+
+# Retry sooner while we have never built a snapshot (e.g. Yahoo down at startup)
+RETRY_SECONDS = 15
+
+
+class MarketRefresher:
+    """Daemon thread that refreshes a SnapshotCache every `interval` seconds.
+
+    Script reruns only read the cache's latest snapshot, without touching the
+    network. Start one per server process (the dashboard wraps it in
+    st.cache_resource), so refresh load is the same whether one viewer or a
+    hundred are connected.
+    """
+
+    def __init__(self, snapshots, interval=REFRESH_SECONDS):
+        self.snapshots = snapshots
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sphaera-refresher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.snapshots.refresh()
+            if METRICS_FILE:
+                METRICS.write_prometheus(METRICS_FILE)
+            if METRICS_LOG:
+                METRICS.log()
+            ready = self.snapshots.current() is not None
+            self._stop.wait(self.interval if ready else RETRY_SECONDS)
@@ -0,0 +1,449 @@
+"""
+SPHAERA RENDERING
+Styled table and chart figures built from a dashboard snapshot
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market_data import PERF_COLUMNS, LOCAL_COLUMNS, FX_CONTRIBUTION_COLUMNS, MACRO_CHANGE_COLUMNS
+from metrics import timed
+
+TABLE_COLUMNS = ['Flag', 'Country', 'Index', 'Price', *PERF_COLUMNS, 'FX 1M %', *LOCAL_COLUMNS, *FX_CONTRIBUTION_COLUMNS, '10Y Yield', 'Yield Δ', 'Inflation', 'Real Rate', 'Policy Rate', 'Term Premium', *MACRO_CHANGE_COLUMNS, 'As Of', 'Stale']
+DEFAULT_COLUMNS = ['Flag', 'Country', 'Index', '1M %', 'YTD %', 'FX 1M %', '10Y Yield', 'Yield Δ', 'Inflation', 'Real Rate', 'Policy Rate', 'As Of', 'Stale']
+
+CHART_TYPES = ["1-Month Performance", "YTD Performance", "FX Performance", "Currency Decomposition", "Yield Comparison", "Yield Changes", "Real Rates", "Term Premium"]
+
+# ============================================================================
+# TABLE STYLING
+# ============================================================================
+
+# Cell colors
+GREEN = 'background-color: #1e3a1e; color: #90ee90'
+RED = 'background-color: #3a1e1e; color: #ff9999'
+GREEN_BOLD = GREEN + '; font-weight: bold'
+RED_BOLD = RED + '; font-weight: bold'
+DEEP_GREEN_BOLD = 'background-color: #1e4a1e; color: #66ff66; font-weight: bold'
+DEEP_RED_BOLD = 'background-color: #4a1e1e; color: #ff6666; font-weight: bold'
+AMBER = 'background-color: #3a331e; color: #ffd966'
+
+# Threshold rules per column: (operator, threshold, css), first match wins, NaN stays unstyled
+PERF_RULES = [('>', 0, GREEN), ('<', 0, RED)]  # green = good, red = bad
+
+YIELD_CHANGE_RULES = [         # RED for rising (bad for bonds), GREEN for falling (good for bonds)
+    ('>', 0.1, RED_BOLD),      # Yields rising
+    ('<', -0.1, GREEN_BOLD),   # Yields falling
+]
+
+REAL_RATE_RULES = [            # RED for negative (loose policy), GREEN for positive/restrictive
+    ('<', -5, DEEP_RED_BOLD),  # Very negative (extremely loose)
+    ('<', 0, RED),             # Negative (loose policy)
+    ('>', 3, DEEP_GREEN_BOLD), # Very positive (very restrictive)
+    ('>', 0, GREEN),           # Positive (restrictive)
+]
+
+ZSCORE_RULES = [               # Unusually strong (green) or weak (red) vs the past year
+    ('>', 2, GREEN_BOLD),
+    ('>', 1, GREEN),
+    ('<', -2, RED_BOLD),
+    ('<', -1, RED),
+]
+
+COLUMN_RULES = {
+    **{col: PERF_RULES for col in [*PERF_COLUMNS, 'FX 1M %', *LOCAL_COLUMNS, *FX_CONTRIBUTION_COLUMNS]},
+    **{col: YIELD_CHANGE_RULES for col in ['Yield Δ', 'Yield Δ 1W', 'Yield Δ 3M']},
+    'Real Rate': REAL_RATE_RULES,
+    '1M Z': ZSCORE_RULES,
+}
+
+
+def column_css(values, rules):
+    """CSS for a whole column in one vectorized np.select call"""
+    values = np.asarray(values, dtype=float)
+    conditions = [values > threshold if op == '>' else values < threshold for op, threshold, _ in rules]
+    # Select a small integer code per cell, then look the CSS strings up in one take
+    codes = np.select(conditions, np.arange(1, len(rules) + 1), default=0)
+    return np.array([''] + [css for _, _, css in rules], dtype=object)[codes]
+
+
+def stale_css(values):
+    """Highlight rows served from last good data"""
+    return np.array(['', AMBER], dtype=object)[np.asarray(values, dtype=bool).astype(np.intp)]
+
+
+def style_column(column):
+    """Styler.apply(axis=0) callback: CSS for one whole column, chosen by its name"""
+    if column.name == 'Stale':
+        # Flag stale values (AMBER = last good data, refresh pending)
+        return stale_css(column)
+    if column.name in COLUMN_RULES:
+        return column_css(column, COLUMN_RULES[column.name])
+    return np.full(len(column), '', dtype=object)
+
+
+def table_formats(display_cols):
+    """Number formats for the selected columns"""
+    format_dict = {}
+    if 'Price' in display_cols:
+        format_dict['Price'] = '{:.2f}'
+    for col in PERF_COLUMNS:
+        if col in display_cols:
+            format_dict[col] = '{:.1f}%'
+    if 'FX 1M %' in display_cols:
+        format_dict['FX 1M %'] = '{:.1f}%'
+    for col in LOCAL_COLUMNS:
+        if col in display_cols:
+            format_dict[col] = '{:.1f}%'
+    for col in FX_CONTRIBUTION_COLUMNS:
+        if col in display_cols:
+            format_dict[col] = '{:+.1f}%'  # Show + or - sign
+    if '10Y Yield' in display_cols:
+        format_dict['10Y Yield'] = '{:.1f}%'
+    for col in ['Yield Δ', 'Yield Δ 1W', 'Yield Δ 3M']:
+        if col in display_cols:
+            format_dict[col] = '{:+.1f}bp'  # Show + or - sign
+    if 'Inflation' in display_cols:
+        format_dict['Inflation'] = '{:.1f}%'
+    if 'Real Rate' in display_cols:
+        format_dict['Real Rate'] = '{:+.1f}%'  # Show + or - sign
+    if 'Policy Rate' in display_cols:
+        format_dict['Policy Rate'] = '{:.2f}%'
+    if 'Term Premium' in display_cols:
+        format_dict['Term Premium'] = '{:.1f}pp'
+    for col in MACRO_CHANGE_COLUMNS:
+        if col in display_cols and col not in format_dict:
+            format_dict[col] = '{:+.1f}pp'
+    for col in ['Vol 1M %', 'Vol 3M %', 'Max DD 1Y %', 'Drawdown %']:
+        if col in display_cols:
+            format_dict[col] = '{:.1f}%'
+    if '1M Z' in display_cols:
+        format_dict['1M Z'] = '{:+.2f}'
+    if 'As Of' in display_cols:
+        format_dict['As Of'] = lambda d: d.strftime('%b %d') if pd.notna(d) else 'N/A'
+    if 'Stale' in display_cols:
+        format_dict['Stale'] = lambda v: '⚠️ stale' if v else ''
+    return format_dict
+
+
+def table_css(display_df):
+    """Cell CSS for the selected columns (same shape as display_df), one call per column"""
+    return pd.DataFrame({col: style_column(display_df[col]) for col in display_df}, index=display_df.index)
+
+
+@dataclass(frozen=True)
+class StyledTable:
+    """Precomputed render artifacts for one (snapshot, column selection).
+
+    Safe to share between sessions: styler() builds a fresh, cheap Styler that
+    just replays the precomputed CSS instead of re-running the color rules.
+    """
+    data: pd.DataFrame
+    css: pd.DataFrame
+    formats: dict
+
+    def styler(self):
+        css = self.css
+        return self.data.style.apply(lambda _: css, axis=None).format(self.formats, na_rep='N/A')
+
+
+@timed('style_table')
+def style_table(df, display_cols):
+    """Build the styled-table artifacts for the selected columns"""
+    display_df = df[list(display_cols)].copy()
+    return StyledTable(display_df, table_css(display_df), table_formats(display_cols))
+
+# ============================================================================
+# KEY METRICS
+# ============================================================================
+
+@timed('key_metrics')
+def key_metrics(index):
+    """(label, value, delta) for each Market Snapshot card from a ScreenIndex; empty until some country has a 1M return"""
+    # Countries without data are left out (missing values are NaN, never 0.0)
+    summary = index.summary()
+    if not summary['valid_1m']:
+        return []
+
+    def card(label, row, column):
+        if row is None:
+            return (label, "Loading...", "0.0%")
+        return (label, f"{row['Flag']} {row['Country']}", f"{row[column]:.1f}%")
+
+    return [
+        card("🏆 Best 1M", summary['best_1m'], '1M %'),
+        card("📉 Worst 1M", summary['worst_1m'], '1M %'),
+        card("🎯 Best YTD", summary['best_ytd'], 'YTD %'),
+        ("📊 Avg 1M", f"{summary['avg_1m']:.1f}%", f"{summary['positive_1m']}/{summary['valid_1m']} +"),
+        card("💰 High Yield", summary['high_yield'], '10Y Yield'),
+    ]
+
+# ============================================================================
+# CHARTS
+# ============================================================================
+
+@timed('build_chart')
+def build_chart(df, chart_type):
+    """Plotly figure for one of CHART_TYPES"""
+    # Imported here so Plotly only loads once the charts section first renders
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if chart_type == "1-Month Performance":
+        # Filter valid data
+        chart_data = df.dropna(subset=['1M %']).sort_values('1M %')
+
+        fig = px.bar(
+            chart_data,
+            y='Country',
+            x='1M %',
+            orientation='h',
+            title='1-Month Index Performance (%)',
+            color='1M %',
+            color_continuous_scale=['red', 'yellow', 'green'],
+            text='1M %'
+        )
+        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        fig.update_layout(height=600, showlegend=False)
+        return fig
+
+    elif chart_type == "YTD Performance":
+        # Filter valid data
+        chart_data = df.dropna(subset=['YTD %']).sort_values('YTD %')
+
+        fig = px.bar(
+            chart_data,
+            y='Country',
+            x='YTD %',
+            orientation='h',
+            title=f'Year-to-Date Performance (Since Jan 1, {datetime.now().year}) (%)',
+            color='YTD %',
+            color_continuous_scale=['red', 'yellow', 'green'],
+            text='YTD %'
+        )
+        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        fig.update_layout(height=600, showlegend=False)
+        return fig
+
+    elif chart_type == "FX Performance":
+        chart_data = df.dropna(subset=['FX 1M %']).sort_values('FX 1M %')
+
+        fig = px.bar(
+            chart_data,
+            y='Country',
+            x='FX 1M %',
+            orientation='h',
+            title='Currency Performance vs USD - 1 Month (%)',
+            color='FX 1M %',
+            color_continuous_scale=['red', 'yellow', 'green'],
+            text='FX 1M %'
+        )
+        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        fig.update_layout(height=600, showlegend=False)
+        return fig
+
+    elif chart_type == "Currency Decomposition":
+        # USD return = local-currency equity return + FX contribution
+        chart_data = df.dropna(subset=['1M %', 'Local 1M %']).sort_values('1M %')
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            name='Local equity return',
+            x=chart_data['Local 1M %'],
+            y=chart_data['Country'],
+            orientation='h',
+            marker_color='#60A5FA',
+            hovertemplate='<b>%{y}</b><br>Local return: %{x:+.1f}%<extra></extra>'
+        ))
+
+        fig.add_trace(go.Bar(
+            name='FX contribution',
+            x=chart_data['FX Contrib 1M %'],
+            y=chart_data['Country'],
+            orientation='h',
+            marker_color=['#44ff44' if x > 0 else '#ff4444' for x in chart_data['FX Contrib 1M %']],
+            hovertemplate='<b>%{y}</b><br>FX contribution: %{x:+.1f}%<extra></extra>'
+        ))
+
+        fig.add_trace(go.Scatter(
+            name='USD return',
+            x=chart_data['1M %'],
+            y=chart_data['Country'],
+            mode='markers',
+            marker=dict(symbol='diamond', size=10, color='white'),
+            hovertemplate='<b>%{y}</b><br>USD return: %{x:+.1f}%<extra></extra>'
+        ))
+
+        fig.update_layout(
+            title='1-Month USD Return, Decomposed (%)<br><sub>🔵 Local equity return + 🟢/🔴 FX contribution = ◆ USD return</sub>',
+            barmode='relative',
+            xaxis_title='Return (%)',
+            yaxis_title='',
+            height=600
+        )
+        return fig
+
+    elif chart_type == "Yield Comparison":
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            name='10-Year Yield',
+            x=df['Country'],
+            y=df['10Y Yield'],
+            marker_color='lightblue',
+            text=df['10Y Yield'],
+            texttemplate='%{text:.1f}%',
+            textposition='outside'
+        ))
+
+        fig.add_trace(go.Bar(
+            name='Policy Rate',
+            x=df['Country'],
+            y=df['Policy Rate'],
+            marker_color='lightgreen',
+            text=df['Policy Rate'],
+            texttemplate='%{text:.1f}%',
+            textposition='outside'
+        ))
+
+        fig.update_layout(
+            title='10-Year Yields vs Policy Rates',
+            barmode='group',
+            height=600,
+            xaxis_tickangle=-45
+        )
+        return fig
+
+    elif chart_type == "Yield Changes":
+        # Sort by yield change magnitude (countries without a previous yield have none)
+        chart_data = df.dropna(subset=['Yield Δ']).sort_values('Yield Δ')
+
+        # Create colors: red for positive (rising yields), green for negative (falling)
+        colors = ['#ff4444' if x > 0 else '#44ff44' if x < 0 else '#888888' 
+                  for x in chart_data['Yield Δ']]
+
+        # Create direction indicators based on yield change
+        directions = ['↑ Rising' if x > 0.1 else '↓ Falling' if x < -0.1 else '→ Flat' 
+                      for x in chart_data['Yield Δ']]
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            x=chart_data['Yield Δ'],
+            y=chart_data['Country'],
+            orientation='h',
+            marker_color=colors,
+            text=chart_data['Yield Δ'],
+            texttemplate='%{text:+.1f}bp',
+            textposition='outside',
+            customdata=directions,
+            hovertemplate='<b>%{y}</b><br>' +
+                          'Yield Change: %{x:+.1f}bp<br>' +
+                          'Trend: %{customdata}<extra></extra>'
+        ))
+
+        fig.update_layout(
+            title='10-Year Yield Changes (1 Month)<br><sub>🔴 RED = Rising Yields (Bad for Bonds) | 🟢 GREEN = Falling Yields (Good for Bonds)</sub>',
+            xaxis_title='Basis Points Change',
+            yaxis_title='',
+            height=600,
+            showlegend=False,
+            # Add vertical line at zero
+            shapes=[dict(
+                type='line',
+                x0=0, x1=0,
+                y0=-0.5, y1=len(chart_data)-0.5,
+                line=dict(color='white', width=2, dash='dash')
+            )]
+        )
+        return fig
+
+    elif chart_type == "Real Rates":
+        # Sort by real rate
+        chart_data = df.sort_values('Real Rate')
+
+        # Create colors: green for positive (tight policy), red for negative (loose policy)
+        colors = ['#44ff44' if x > 3 else '#90ee90' if x > 0 else '#ff9999' if x > -5 else '#ff4444' 
+                  for x in chart_data['Real Rate']]
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            x=chart_data['Real Rate'],
+            y=chart_data['Country'],
+            orientation='h',
+            marker_color=colors,
+            text=chart_data['Real Rate'],
+            texttemplate='%{text:+.1f}%',
+            textposition='outside',
+            hovertemplate='<b>%{y}</b><br>' +
+                          'Real Rate: %{x:+.1f}%<br>' +
+                          'Policy Rate: ' + chart_data['Policy Rate'].astype(str) + '%<br>' +
+                          'Inflation: ' + chart_data['Inflation'].astype(str) + '%<extra></extra>'
+        ))
+
+        fig.update_layout(
+            title='Real Policy Rates (Policy Rate - Inflation)<br><sub>🟢 GREEN = Restrictive (Positive) | 🔴 RED = Accommodative (Negative)</sub>',
+            xaxis_title='Real Rate (%)',
+            yaxis_title='',
+            height=600,
+            showlegend=False,
+            # Add vertical line at zero
+            shapes=[dict(
+                type='line',
+                x0=0, x1=0,
+                y0=-0.5, y1=len(chart_data)-0.5,
+                line=dict(color='white', width=2, dash='dash')
+            )]
+        )
+        return fig
+
+    elif chart_type == "Term Premium":
+        chart_data = df.sort_values('Term Premium')
+
+        fig = px.bar(
+            chart_data,
+            x='Country',
+            y='Term Premium',
+            title='Term Premium (10Y Yield - Policy Rate)',
+            color='Term Premium',
+            color_continuous_scale=['blue', 'yellow', 'red'],
+            text='Term Premium'
+        )
+        fig.update_traces(texttemplate='%{text:.1f}pp', textposition='outside')
+        fig.update_layout(height=600, xaxis_tickangle=-45)
+        return fig
+
+    raise ValueError(f"Unknown chart type: {chart_type}")
+
+
+@timed('build_heatmap')
+def build_correlation_heatmap(matrix, labels, window):
+    """Plotly heatmap of a correlation matrix, rows and columns ordered and named by labels ({ticker: label})"""
+    import plotly.graph_objects as go
+
+    tickers = [ticker for ticker in labels if ticker in matrix.index]
+    matrix = matrix.loc[tickers, tickers]
+    names = [labels[ticker] for ticker in tickers]
+
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=names,
+        y=names,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu',
+        reversescale=True,     # red = moving together, blue = moving apart
+        hoverongaps=False,
+        hovertemplate='%{y}<br>%{x}<br>Correlation: %{z:.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'Correlation of Daily Returns ({window})',
+        height=max(600, 18 * len(names)),
+        xaxis_tickangle=-45,
+        yaxis_autorange='reversed'
+    )
+    return fig
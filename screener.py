@@ -0,0 +1,133 @@
+"""
+SPHAERA SCREENER
+Server-side filtering, sorting and paging of a dashboard snapshot. Every
+metric's sort order is computed once per snapshot, so a query is a mask and a
+slice, and only one page of rows is sent to the browser
+"""
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+# Rows per screener page
+PAGE_SIZE = int(os.environ.get('SPHAERA_SCREENER_PAGE_SIZE', 25))
+
+# Columns that are not metrics: labels, dates and flags
+LABEL_COLUMNS = ['Flag', 'Country', 'Index', 'As Of', 'Stale']
+
+
+@dataclass(frozen=True)
+class Screen:
+    """One screener query: filters, sort and page.
+
+    `groups` keeps only rows in those groups (regions), all if empty.
+    `ranges` holds (column, low, high) bounds, inclusive, None for open. A
+    row with no value for a bounded column fails the bound. `valid_only`
+    drops stale rows and rows without a value to sort by.
+    """
+    sort_by: str = '1M %'
+    descending: bool = True
+    groups: tuple = ()
+    ranges: tuple = ()
+    valid_only: bool = False
+    page: int = 0
+    page_size: int = PAGE_SIZE
+
+
+@dataclass(frozen=True)
+class ScreenPage:
+    """One page of screener results, and how many rows matched in all"""
+    data: pd.DataFrame
+    total: int
+    page: int
+    pages: int
+
+
+class ScreenIndex:
+    """Sort orders and summary metrics of one snapshot's table, built once and shared by every query.
+
+    For each metric column it holds the row order ascending and descending
+    (stable, missing values last) and how many rows have a value. A query
+    walks the order it sorts by and keeps the rows that pass its filters, so
+    it never sorts, and it copies out only the page it returns.
+    """
+
+    @timed('screen_index')
+    def __init__(self, data, groups=None):
+        self.data = data
+        self.groups = np.asarray(groups if groups is not None else [None] * len(data), dtype=object)
+        self.columns = [col for col in data.columns if col not in LABEL_COLUMNS]
+        self._values = {col: data[col].to_numpy(dtype=float) for col in self.columns}
+        self._stale = data['Stale'].to_numpy(dtype=bool) if 'Stale' in data else np.zeros(len(data), dtype=bool)
+
+        self._orders = {}
+        self._counts = {}
+        for col, values in self._values.items():
+            # NaN sorts last either way, and ties keep table order
+            self._orders[col, False] = np.argsort(values, kind='stable')
+            self._orders[col, True] = np.argsort(-values, kind='stable')
+            self._counts[col] = int(np.count_nonzero(~np.isnan(values)))
+
+    def __len__(self):
+        return len(self.data)
+
+    def bounds(self, column):
+        """(min, max) of a metric column, or None if it has no values"""
+        if not self._counts[column]:
+            return None
+        ascending = self._orders[column, False]
+        values = self._values[column]
+        return values[ascending[0]], values[ascending[self._counts[column] - 1]]
+
+    def top(self, column, descending=True):
+        """Row (a Series) with the highest (or lowest) value of a metric, or None if it has no values"""
+        if not self._counts[column]:
+            return None
+        return self.data.iloc[self._orders[column, descending][0]]
+
+    def summary(self):
+        """Every Market Snapshot figure at once: rows from the sort orders, the 1M average and breadth in one pass"""
+        values = self._values['1M %']
+        valid = ~np.isnan(values)
+        count = int(np.count_nonzero(valid))
+        return {
+            'best_1m': self.top('1M %'),
+            'worst_1m': self.top('1M %', descending=False),
+            'best_ytd': self.top('YTD %'),
+            'high_yield': self.top('10Y Yield'),
+            'avg_1m': float(values[valid].mean()) if count else float('nan'),
+            'positive_1m': int(np.count_nonzero(values[valid] > 0)),
+            'valid_1m': count,
+        }
+
+    def _mask(self, screen):
+        """Rows passing the screen's filters, by table position"""
+        mask = np.ones(len(self.data), dtype=bool)
+        if screen.groups:
+            mask &= np.isin(self.groups, list(screen.groups))
+        for column, low, high in screen.ranges:
+            values = self._values[column]
+            # NaN compares False, so a row without a value fails any bound
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        if screen.valid_only:
+            mask &= ~self._stale & ~np.isnan(self._values[screen.sort_by])
+        return mask
+
+    def query(self, screen):
+        """ScreenPage for a Screen; a page past the end is clamped to the last one"""
+        if screen.sort_by not in self._values:
+            raise KeyError(f"Cannot sort the screener by {screen.sort_by!r}; expected one of {self.columns}")
+        order = self._orders[screen.sort_by, screen.descending]
+        hits = order[self._mask(screen)[order]]
+
+        pages = max(-(-len(hits) // screen.page_size), 1)
+        page = min(max(screen.page, 0), pages - 1)
+        start = page * screen.page_size
+        return ScreenPage(self.data.iloc[hits[start:start + screen.page_size]], len(hits), page, pages)
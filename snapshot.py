@@ -0,0 +1,119 @@
+"""
+SPHAERA MARKET SNAPSHOT
+Process-wide dashboard data shared by every session, loaded single-flight
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from metrics import METRICS, timed
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """One published build of the dashboard table. Treat `data` as read-only.
+
+    `version` counts builds of one cache; for a combined snapshot it is a
+    tuple naming every partition build (and country filter) that went in.
+    """
+    version: object
+    updated_at: datetime
+    data: pd.DataFrame
+
+
+class SnapshotCache:
+    """Holds the latest MarketSnapshot with single-flight loading.
+
+    However many sessions (or the background refresher) ask for a refresh at
+    the same moment, only one `load()` runs; everyone else waits for it and
+    reuses its result. A failed load keeps the previous snapshot and leaves
+    its exception in `last_error` (cleared by the next good load).
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._in_flight = None
+        self.last_error = None
+
+    def current(self):
+        """Latest published snapshot (never blocks), or None before the first load"""
+        return self._snapshot
+
+    def seed(self, data, updated_at):
+        """Publish a previously exported table (e.g. from disk) if nothing has been loaded yet"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = MarketSnapshot(1, updated_at, data)
+
+    def refresh(self, timeout=None):
+        """Run one load, or join the one already in flight. Returns the latest snapshot."""
+        with self._lock:
+            flight = self._in_flight
+            leader = flight is None
+            if leader:
+                flight = self._in_flight = threading.Event()
+
+        if not leader:
+            flight.wait(timeout)
+            return self._snapshot
+
+        try:
+            with timed('snapshot_load'):
+                data = self._load()
+        except Exception as exc:
+            logger.exception("Market snapshot load failed")
+            self.last_error = exc
+        else:
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = MarketSnapshot(version, datetime.now(timezone.utc), data)
+            self.last_error = None
+        finally:
+            with self._lock:
+                self._in_flight = None
+            flight.set()
+
+        return self._snapshot
+
+    def refresh_in_background(self):
+        """Start a single-flight refresh on a daemon thread and return immediately"""
+        if self._in_flight is None:
+            threading.Thread(target=self.refresh, name='sphaera-revalidate', daemon=True).start()
+
+    def get(self, timeout=None, max_age=None):
+        """Latest snapshot, served stale-while-revalidate.
+
+        Only blocks (single-flight) if nothing has been published yet. A
+        snapshot older than `max_age` seconds is still returned immediately,
+        while a refresh runs in the background.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            METRICS.inc('cache_misses_total', cache='snapshot')
+            return self.refresh(timeout)
+        METRICS.inc('cache_hits_total', cache='snapshot')
+        if max_age is not None and (datetime.now(timezone.utc) - snapshot.updated_at).total_seconds() > max_age:
+            self.refresh_in_background()
+        return snapshot
+
+
+def combine_snapshots(parts, countries=None):
+    """One snapshot over several partition snapshots ({name: MarketSnapshot}, e.g. per region).
+
+    Rows keep partition order, optionally narrowed to `countries`;
+    `updated_at` is the oldest partition's.
+    """
+    data = pd.concat([part.data for part in parts.values()], ignore_index=True)
+    version = tuple((name, part.version) for name, part in parts.items())
+    if countries:
+        data = data[data['Country'].isin(countries)].reset_index(drop=True)
+        version += (tuple(countries),)
+    updated_at = min(part.updated_at for part in parts.values())
+    return MarketSnapshot(version, updated_at, data)
@@ -4,13 +4,25 @@ Simplified version with more countries
 """
 
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-import time
-import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timezone
+
+from universe import load_universe
+from market_data import load_dashboard_data, replay_dashboard_data, market_tickers, history_start, HISTORY_DAYS
+from macro_store import MacroStore
+from price_store import PriceStore
+from history_cache import HistoryCache
+from price_archive import load_archive
+from refresher import MarketRefresher, REFRESH_SECONDS
+from live import LiveFeed, LIVE_SECONDS
+from snapshot import MarketSnapshot, SnapshotCache, combine_snapshots
+from export_snapshot import read_latest_snapshot
+from render import TABLE_COLUMNS, DEFAULT_COLUMNS, CHART_TYPES, style_table, key_metrics, build_chart, build_correlation_heatmap
+from screener import Screen, ScreenIndex, PAGE_SIZE
+from metrics import METRICS, timed
+from analytics import RiskEngine, CorrelationEngine, CORRELATION_WINDOWS, risk_by_country, instrument_labels
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -32,29 +44,24 @@ st.set_page_config(
 # HEADER
 # ============================================================================
 
-# Load logo
-@st.cache_data
-def get_logo():
-    """Load and encode logo as base64"""
-    try:
-        # Use the optimized dashboard header version
-        with open('/mnt/user-data/outputs/sphaera_dashboard_header.png', 'rb') as f:
-            return base64.b64encode(f.read()).decode()
-    except:
-        # Fallback: try alternate paths
-        try:
-            with open('sphaera_dashboard_header.png', 'rb') as f:
-                return base64.b64encode(f.read()).decode()
-        except:
-            return None
-
-logo_base64 = get_logo()
+# Logos are served by Streamlit's static file server (see .streamlit/config.toml)
+# rather than inlined as base64, so they are fetched once and cached by the browser
+# instead of being resent with every rerun
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+def static_url(filename):
+    """URL of a file in static/, or None if it isn't there"""
+    if os.path.exists(os.path.join(STATIC_DIR, filename)):
+        return f'app/static/{filename}'
+    return None
+
+logo_url = static_url('sphaera_dashboard_header.png')
 
 # Display header with logo or fallback
-if logo_base64:
+if logo_url:
     st.markdown(f"""
         <div style='text-align: center; padding: 30px 20px 20px 20px;'>
-            <img src='data:image/png;base64,{logo_base64}' 
+            <img src='{logo_url}' 
                  style='width: 380px; max-width: 100%;' 
                  alt='SPHAERA Global Research'/>
             <p style='font-size: 16px; color: #9CA3AF; margin-top: 12px; font-weight: 500; letter-spacing: 0.5px;'>
@@ -76,354 +83,268 @@ else:
         </div>
     """, unsafe_allow_html=True)
 
-st.markdown(f"**Last Updated:** {datetime.now().strftime('%B %d, %Y at %H:%M UTC')}")
+last_updated = st.empty()  # filled in once the data snapshot is read
 st.markdown("---")
 
 # ============================================================================
-# DATA CONFIGURATION - EXPANDED LIST
+# DATA FETCH - BACKGROUND REFRESHER (one per server, not per session)
 # ============================================================================
 
+@st.cache_resource
+def get_history():
+    """On-disk price history shared by every session (survives restarts), read through a memory-bounded cache"""
+    return HistoryCache(PriceStore())
+
+@st.cache_resource
+def get_region_snapshots(region):
+    """Process-wide snapshot cache for one region, kept current by its own background refresher.
+
+    Created the first time any session views the region, so only regions
+    somebody is looking at are fetched and computed.
+    """
+    store = get_history()
+    macro = MacroStore()
+
+    def load():
+        # Universe and macro files are re-read only when they change, so edits land on the next refresh
+        universe = load_universe()
+        regional = universe.subset(universe.countries(region))
+        return load_dashboard_data(store, regional.markets, macro.history())
+
+    snapshots = SnapshotCache(load)
+
+    # Come up warm from the newest headless export (export_snapshot.py) while the first refresh runs
+    exported = read_latest_snapshot()
+    if exported is not None:
+        data, updated_at = exported
+        rows = data[data['Country'].isin(load_universe().countries(region))]
+        if not rows.empty:
+            snapshots.seed(rows.reset_index(drop=True), updated_at)
+    MarketRefresher(snapshots).start()
+    return snapshots
+
+@st.cache_resource
+def get_live_feed(region):
+    """Process-wide live quotes for one region, applied to its latest snapshot (polled only while someone is in live mode)"""
+    def markets():
+        universe = load_universe()
+        return universe.subset(universe.countries(region)).markets
+
+    return LiveFeed(get_region_snapshots(region), get_history(), markets)
+
+@st.cache_resource
+def get_local_sources():
+    """Local price history and macro store read by replay and analytics (never the network)"""
+    return get_history(), MacroStore()
+
+def replay_snapshot(as_of, countries):
+    """Dashboard snapshot as of a past date, rebuilt from the memory-mapped price archive"""
+    history, macro = get_local_sources()
+    archive = load_archive(history.store)  # a store write since its build swaps in a new one in the background
+    data = replay_dashboard_data(archive, universe.subset(countries).markets, macro.history(), as_of)
+    version = ('replay', as_of.isoformat(), tuple(countries), archive.source_modified_at)
+    return MarketSnapshot(version, datetime.combine(as_of, datetime.min.time(), timezone.utc), data)
+
 # ============================================================================
-# DATA CONFIGURATION - EXPANDED LIST
+# MARKET SELECTION
 # ============================================================================
 
-# Store previous month's yields for change tracking
-# Update these manually each month when you update current yields
-PREVIOUS_YIELDS = {
-    'Brazil': 12.3, 'Mexico': 9.9, 'Argentina': 27.8, 'Chile': 5.9, 'Colombia': 10.0,
-    'China': 2.2, 'India': 7.0, 'Indonesia': 6.9, 'Thailand': 2.7, 'Vietnam': 3.4,
-    'Philippines': 6.3, 'Malaysia': 3.9, 'Taiwan': 1.4, 'Japan': 1.1,
-    'South Africa': 10.0, 'Turkey': 25.2, 'Poland': 6.0, 'UAE': 4.1, 'Saudi Arabia': 4.7, 'Hungary': 6.6,
-    'Morocco': 3.4, "Cote d'Ivoire": 6.7, 'Nigeria': 18.0, 'Egypt': 24.5
-}
-
-EM_MARKETS = {
-    # Latin America
-    'Brazil': {'index': 'EWZ', 'currency': 'BRL=X', 'yield_10y': 13.5, 'policy_rate': 15.00, 'inflation': 4.4, 'flag': '🇧🇷'},
-    'Mexico': {'index': 'EWW', 'currency': 'MXN=X', 'yield_10y': 8.8, 'policy_rate': 7.00, 'inflation': 3.8, 'flag': '🇲🇽'},
-    'Argentina': {'index': 'ARGT', 'currency': 'ARS=X', 'yield_10y': 28.5, 'policy_rate': 29.00, 'inflation': 32.4, 'flag': '🇦🇷'},
-    'Chile': {'index': 'ECH', 'currency': 'CLP=X', 'yield_10y': 5.3, 'policy_rate': 4.50, 'inflation': 2.8, 'flag': '🇨🇱'},
-    'Colombia': {'index': 'GXG', 'currency': 'COP=X', 'yield_10y': 13.5, 'policy_rate': 10.25, 'inflation': 5.35, 'flag': '🇨🇴'},
-    
-    # Asia
-    'China': {'index': 'FXI', 'currency': 'CNY=X', 'yield_10y': 1.8, 'policy_rate': 3.00, 'inflation': 0.2, 'flag': '🇨🇳'},
-    'India': {'index': 'EPI', 'currency': 'INR=X', 'yield_10y': 6.7, 'policy_rate': 5.25, 'inflation': 2.75, 'flag': '🇮🇳'},
-    'Indonesia': {'index': 'EIDO', 'currency': 'IDR=X', 'yield_10y': 6.4, 'policy_rate': 4.75, 'inflation': 3.55, 'flag': '🇮🇩'},
-    'Thailand': {'index': 'THD', 'currency': 'THB=X', 'yield_10y': 1.6, 'policy_rate': 1.00, 'inflation': -0.66, 'flag': '🇹🇭'},
-    'South Korea': {'index': 'EWY', 'currency': 'KRW=X', 'yield_10y': 3.4, 'policy_rate': 2.50, 'inflation': 2.0, 'flag': '🇰🇷'},
-    'Vietnam': {'index': 'VNM', 'currency': 'VND=X', 'yield_10y': 4.2, 'policy_rate': 4.50, 'inflation': 2.53, 'flag': '🇻🇳'},
-    'Philippines': {'index': 'EPHE', 'currency': 'PHP=X', 'yield_10y': 5.9, 'policy_rate': 4.25, 'inflation': 2.00, 'flag': '🇵🇭'},
-    'Malaysia': {'index': 'EWM', 'currency': 'MYR=X', 'yield_10y': 3.5, 'policy_rate': 2.75, 'inflation': 1.6, 'flag': '🇲🇾'},
-    'Taiwan': {'index': 'EWT', 'currency': 'TWD=X', 'yield_10y': 1.4, 'policy_rate': 2.00, 'inflation': 0.69, 'flag': '🇹🇼'},
-    'Japan': {'index': 'EWJ', 'currency': 'JPY=X', 'yield_10y': 2.1, 'policy_rate': 0.75, 'inflation': 1.5, 'flag': '🇯🇵'},
-    
-    # EMEA
-    'Turkey': {'index': 'TUR', 'currency': 'TRY=X', 'yield_10y': 30.2, 'policy_rate': 37.00, 'inflation': 30.65, 'flag': '🇹🇷'},
-    'Poland': {'index': 'EPOL', 'currency': 'PLN=X', 'yield_10y': 5.0, 'policy_rate': 4.00, 'inflation': 2.2, 'flag': '🇵🇱'},
-    'UAE': {'index': 'UAE', 'currency': 'AED=X', 'yield_10y': 4.2, 'policy_rate': 3.65, 'inflation': 2.17, 'flag': '🇦🇪'},
-    'Saudi Arabia': {'index': 'KSA', 'currency': 'SAR=X', 'yield_10y': 4.8, 'policy_rate': 4.25, 'inflation': 1.8, 'flag': '🇸🇦'},
-    'Hungary': {'index': 'N/A', 'currency': 'HUF=X', 'yield_10y': 6.5, 'policy_rate': 6.25, 'inflation': 2.1, 'flag': '🇭🇺'},
-    
-    # Africa
-    'South Africa': {'index': 'EZA', 'currency': 'ZAR=X', 'yield_10y': 7.9, 'policy_rate': 6.75, 'inflation': 3.5, 'flag': '🇿🇦'},
-    'Morocco': {'index': 'N/A', 'currency': 'MAD=X', 'yield_10y': 3.0, 'policy_rate': 2.25, 'inflation': -0.8, 'flag': '🇲🇦'},
-    "Cote d'Ivoire": {'index': 'N/A', 'currency': 'XOF=X', 'yield_10y': 7.8, 'policy_rate': 5.25, 'inflation': 0.3, 'flag': '🇨🇮'},
-    'Nigeria': {'index': 'N/A', 'currency': 'NGN=X', 'yield_10y': 15.5, 'policy_rate': 26.5, 'inflation': 15.1, 'flag': '🇳🇬'},
-    'Egypt': {'index': 'N/A', 'currency': 'EGP=X', 'yield_10y': 20.0, 'policy_rate': 19.0, 'inflation': 11.9, 'flag': '🇪🇬'},
-}
+universe = load_universe()
 
-# ============================================================================
-# SIMPLE DATA FETCH FUNCTION
-# ============================================================================
+select_regions, select_countries, select_date, select_live = st.columns([2, 3, 1, 1])
+with select_regions:
+    regions = st.multiselect("🌐 Regions", universe.regions, default=universe.regions)
+with select_countries:
+    countries = st.multiselect(
+        "📍 Countries",
+        [country for region in regions for country in universe.countries(region)],
+        placeholder="All countries in the selected regions",
+    )
+with select_date:
+    as_of = st.date_input("🕰️ As of", value=None, max_value=date.today(), help="Replay a past date from local history")
+with select_live:
+    live = st.toggle(
+        "📡 Live",
+        disabled=as_of is not None and as_of < date.today(),
+        help=f"Intraday mode: poll the latest index and FX quotes every {LIVE_SECONDS}s and update only the rows that moved",
+    )
 
-@st.cache_data(ttl=300, show_spinner=False)
-def get_price_change(ticker, days=30):
-    """Get simple price change - returns 0 if fails"""
-    try:
-        if ticker == 'N/A':
-            return 0.0
-        
-        # Get more data to ensure we have enough trading days
-        data = yf.download(ticker, period='2mo', progress=False)
-        
-        if data.empty or len(data) < 2:
-            return 0.0
-        
-        # Current price (most recent close)
-        current = float(data['Close'].iloc[-1])
-        
-        # Price from ~30 trading days ago (or earliest available)
-        # Most markets have ~22 trading days per month, so -30 is safe
-        lookback_index = min(30, len(data) - 1)
-        past = float(data['Close'].iloc[-lookback_index - 1])
-        
-        # Calculate percentage change
-        change = ((current / past) - 1) * 100
-        return round(change, 2)
-    except:
-        return 0.0
-
-@st.cache_data(ttl=300, show_spinner=False)
-def get_current_price(ticker):
-    """Get current price"""
-    try:
-        if ticker == 'N/A':
-            return 'N/A'
-        
-        data = yf.download(ticker, period='5d', progress=False)
-        
-        if data.empty:
-            return 'N/A'
-        
-        return round(float(data['Close'].iloc[-1]), 2)
-    except:
-        return 'N/A'
-
-@st.cache_data(ttl=300, show_spinner=False)
-def get_ytd_performance(ticker):
-    """Get Year-to-Date performance"""
-    try:
-        if ticker == 'N/A':
-            return 0.0
-        
-        # Download data from Jan 1 of current year
-        data = yf.download(ticker, period='1y', progress=False)
-        
-        if data.empty or len(data) < 2:
-            return 0.0
-        
-        # Find first trading day of the year
-        current_year = datetime.now().year
-        year_start_data = data[data.index.year == current_year]
-        
-        if year_start_data.empty:
-            return 0.0
-        
-        start_price = float(year_start_data['Close'].iloc[0])
-        current_price = float(data['Close'].iloc[-1])
-        
-        ytd_change = ((current_price / start_price) - 1) * 100
-        return round(ytd_change, 2)
-    except:
-        return 0.0
+if not regions:
+    st.info("Select at least one region to load.")
+    st.stop()
 
 # ============================================================================
 # BUILD DASHBOARD DATA
 # ============================================================================
 
-st.markdown("### 📊 Loading Market Data...")
-
-progress_bar = st.progress(0)
-status_text = st.empty()
-
-dashboard_data = []
-total = len(EM_MARKETS)
-
-for idx, (country, info) in enumerate(EM_MARKETS.items()):
-    status_text.text(f"Loading {country}... ({idx+1}/{total})")
-    progress_bar.progress((idx + 1) / total)
-    
-    # Get data
-    index_1m = get_price_change(info['index'], 30)
-    index_3m = get_price_change(info['index'], 90)
-    index_ytd = get_ytd_performance(info['index'])
-    fx_1m = get_price_change(info['currency'], 30)
-    current_price = get_current_price(info['index'])
-    
-    # Calculate yield change (current - previous)
-    current_yield = info['yield_10y']
-    previous_yield = PREVIOUS_YIELDS.get(country, current_yield)
-    yield_change = current_yield - previous_yield
-    
-    # Calculate Real Rate (Policy Rate - Inflation)
-    real_rate = info['policy_rate'] - info['inflation']
-    
-    dashboard_data.append({
-        'Flag': info['flag'],
-        'Country': country,
-        'Index': info['index'],
-        'Price': current_price,
-        '1M %': index_1m,
-        '3M %': index_3m,
-        'YTD %': index_ytd,
-        'FX 1M %': fx_1m,
-        '10Y Yield': current_yield,
-        'Yield Δ': yield_change,
-        'Inflation': info['inflation'],
-        'Real Rate': real_rate,
-        'Policy Rate': info['policy_rate'],
-        'Term Premium': round(current_yield - info['policy_rate'], 1)
-    })
-    
-    time.sleep(0.1)  # Small delay to avoid rate limits
-
-progress_bar.empty()
-status_text.empty()
-
-df = pd.DataFrame(dashboard_data)
-
-st.success("✅ Data loaded successfully!")
+if as_of is not None and as_of < date.today():
+    # Replay: computed from local history only, in milliseconds
+    region_caches = {}
+    selected = countries or [country for region in regions for country in universe.countries(region)]
+    snapshot = replay_snapshot(as_of, selected)
+    last_updated.markdown(f"**Replaying:** close of {as_of.strftime('%B %d, %Y')} · from local history")
+else:
+    # Reruns only read the latest snapshot of each selected region; on a cold start every session joins
+    # the same single load per region, and the regions load in parallel on their refresher threads.
+    # If a refresher has fallen behind we still serve its last good snapshot and revalidate in the background.
+    region_caches = {region: get_region_snapshots(region) for region in regions}
+    with st.spinner("📊 Loading Market Data..."):
+        parts = {region: cache.get(timeout=120, max_age=2 * REFRESH_SECONDS) for region, cache in region_caches.items()}
+
+    missing = [region for region, part in parts.items() if part is None]
+    parts = {region: part for region, part in parts.items() if part is not None}
+    if not parts:
+        st.error("⚠️ Market data is not available yet. Please try again in a moment.")
+        st.stop()
+    if missing:
+        st.warning(f"⚠️ Still loading: {', '.join(missing)}")
+
+    snapshot = combine_snapshots(parts, countries)
+    versions = ', '.join(f"{region} v{part.version}" for region, part in parts.items())
+    last_updated.markdown(f"**Last Updated:** {snapshot.updated_at.strftime('%B %d, %Y at %H:%M UTC')} · snapshots {versions}")
+
+df = snapshot.data
+stale_countries = df.loc[df['Stale'], 'Country'].tolist()
+# A region whose latest refresh failed keeps serving its previous snapshot
+failed_refreshes = {region: cache.last_error for region, cache in region_caches.items() if cache.last_error is not None and region in parts}
+if stale_countries or failed_refreshes:
+    if stale_countries:
+        st.warning(f"⚠️ Showing last good data for: {', '.join(stale_countries)} (see 'As Of')")
+    for region, error in failed_refreshes.items():
+        st.warning(f"⚠️ Last refresh failed for {region}, showing the snapshot from {parts[region].updated_at.strftime('%H:%M UTC')}: {error}")
+else:
+    st.success("✅ Data loaded successfully!")
 st.markdown("---")
 
 # ============================================================================
-# KEY METRICS
+# KEY METRICS & MAIN DATA TABLE
 # ============================================================================
 
-st.markdown("### 📈 Market Snapshot")
-
-col1, col2, col3, col4, col5 = st.columns(5)
+# Render artifacts are memoized per snapshot version, so toggling columns or charts
+# is a lookup instead of a rebuild. Underscore args are not hashed by Streamlit.
+# Bodies only run on a cache miss, so misses are counted inside and lookups outside.
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_screen_index(version, _df):
+    METRICS.inc('cache_misses_total', cache='screen_index')
+    regions = universe.table['region'].astype(object).reindex(_df['Country']).to_numpy()
+    return ScreenIndex(_df, regions)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_key_metrics(version, _index):
+    METRICS.inc('cache_misses_total', cache='key_metrics')
+    return key_metrics(_index)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_styled_table(version, display_cols, _df):
+    METRICS.inc('cache_misses_total', cache='styled_table')
+    return style_table(_df, display_cols)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_chart(version, chart_type, _df):
+    METRICS.inc('cache_misses_total', cache='chart')
+    return build_chart(_df, chart_type)
+
+# Widgets in a fragment only rerun this section against the current snapshot,
+# not the whole script
+@st.fragment
+def market_overview(snapshot):
+    # Screener: filtered, sorted and paged on the server against sort orders built once
+    # per snapshot, so only one styled page is sent to the browser however large the universe
+    METRICS.inc('cache_lookups_total', cache='screen_index')
+    index = get_screen_index(snapshot.version, snapshot.data)
+
+    sort_col, order_col, filter_col, range_col = st.columns([2, 1, 2, 3])
+    with sort_col:
+        sort_by = st.selectbox("Sort by", index.columns, index=index.columns.index('1M %'), key='screen_sort')
+    with order_col:
+        descending = st.radio("Order", ["High → Low", "Low → High"], key='screen_order') == "High → Low"
+    with filter_col:
+        filter_by = st.selectbox("Filter metric", ["None", *index.columns], key='screen_filter')
+    ranges = ()
+    with range_col:
+        bounds = index.bounds(filter_by) if filter_by != "None" else None
+        if bounds is not None and bounds[0] < bounds[1]:
+            low, high = st.slider(f"{filter_by} range", float(bounds[0]), float(bounds[1]), (float(bounds[0]), float(bounds[1])))
+            ranges = ((filter_by, low, high),)
+
+    group_col, valid_col, size_col = st.columns([5, 2, 1])
+    with group_col:
+        groups = st.multiselect("Regions", regions, placeholder="All selected regions", key='screen_regions') if len(regions) > 1 else []
+    with valid_col:
+        valid_only = st.checkbox("Hide stale and missing values", key='screen_valid')
+    with size_col:
+        page_size = st.selectbox("Rows", sorted({PAGE_SIZE, 25, 50, 100}), key='screen_page_size')
+
+    # Display options
+    display_cols = st.multiselect(
+        "Select columns to display:",
+        options=TABLE_COLUMNS,
+        default=DEFAULT_COLUMNS
+    )
 
-# Filter out countries with valid data
-valid_data = df[df['1M %'] != 0.0]
-valid_ytd = df[df['YTD %'] != 0.0]
+    screen = Screen(sort_by, descending, tuple(groups), ranges, valid_only, st.session_state.get('screen_page', 1) - 1, page_size)
+    with timed('screen_query'):
+        page = index.query(screen)
 
-if not valid_data.empty:
-    with col1:
-        best = valid_data.loc[valid_data['1M %'].idxmax()]
-        st.metric(
-            "🏆 Best 1M",
-            f"{best['Flag']} {best['Country']}",
-            f"{best['1M %']:.1f}%"
-        )
-    
-    with col2:
-        worst = valid_data.loc[valid_data['1M %'].idxmin()]
-        st.metric(
-            "📉 Worst 1M",
-            f"{worst['Flag']} {worst['Country']}",
-            f"{worst['1M %']:.1f}%"
-        )
-    
-    with col3:
-        if not valid_ytd.empty:
-            best_ytd = valid_ytd.loc[valid_ytd['YTD %'].idxmax()]
-            st.metric(
-                "🎯 Best YTD",
-                f"{best_ytd['Flag']} {best_ytd['Country']}",
-                f"{best_ytd['YTD %']:.1f}%"
-            )
-        else:
-            st.metric("🎯 Best YTD", "Loading...", "0.0%")
-    
-    with col4:
-        avg = valid_data['1M %'].mean()
-        st.metric(
-            "📊 Avg 1M",
-            f"{avg:.1f}%",
-            f"{len(valid_data[valid_data['1M %'] > 0])}/{len(valid_data)} +"
-        )
-    
-    with col5:
-        highest = df.loc[df['10Y Yield'].idxmax()]
-        st.metric(
-            "💰 High Yield",
-            f"{highest['Flag']} {highest['Country']}",
-            f"{highest['10Y Yield']:.1f}%"
-        )
+    if display_cols:
+        METRICS.inc('cache_lookups_total', cache='styled_table')
+        styled_table = get_styled_table((snapshot.version, screen), tuple(display_cols), page.data)
+        with timed('render_table'):
+            st.dataframe(styled_table.styler(), use_container_width=True, height=min(600, 35 * (len(page.data) + 1) + 3))
+    else:
+        st.warning("Please select at least one column to display")
+
+    page_col, count_col = st.columns([1, 4])
+    with page_col:
+        # Narrower filters can leave the chosen page past the end; query() already clamped it
+        st.session_state['screen_page'] = page.page + 1
+        st.number_input("Page", min_value=1, max_value=page.pages, key='screen_page')
+    with count_col:
+        st.caption(f"{page.total} of {len(index)} countries match · page {page.page + 1} of {page.pages}")
+
+    # Download button
+    csv = snapshot.data.to_csv(index=False)
+    st.download_button(
+        "📥 Download Full Data (CSV)",
+        csv,
+        f"sphaera_em_{datetime.now().strftime('%Y%m%d')}.csv",
+        "text/csv"
+    )
 
-st.markdown("---")
+# Live mode reruns only this section on a timer. Each region's quotes are polled
+# once per interval for every session, and only the rows that moved are rebuilt.
+live = live and bool(region_caches)
+
+def live_snapshot():
+    """Selected regions with the latest intraday quotes applied, and the version their summary cards are keyed on"""
+    applied = {region: get_live_feed(region).current(timeout=30) for region in parts}
+    live_parts = {region: state[0] if state else parts[region] for region, state in applied.items()}
+    summary_version = tuple((region, state[1] if state else parts[region].version) for region, state in applied.items())
+    return combine_snapshots(live_parts, countries), summary_version + (tuple(countries),)
+
+@st.fragment(run_every=LIVE_SECONDS if live else None)
+def market_board(snapshot):
+    summary_version = snapshot.version
+    if live:
+        snapshot, summary_version = live_snapshot()
+
+    st.markdown("### 📈 Market Snapshot")
+    if live:
+        st.caption(f"📡 Live · quotes as of {snapshot.updated_at.strftime('%H:%M:%S UTC')} · every {LIVE_SECONDS}s")
+
+    METRICS.inc('cache_lookups_total', cache='screen_index')
+    index = get_screen_index(snapshot.version, snapshot.data)
+    METRICS.inc('cache_lookups_total', cache='key_metrics')
+    for column, (label, value, delta) in zip(st.columns(5), get_key_metrics(summary_version, index)):
+        with column:
+            st.metric(label, value, delta)
 
-# ============================================================================
-# MAIN DATA TABLE
-# ============================================================================
+    st.markdown("---")
 
-st.markdown("### 📋 Complete Market Overview")
-
-# Color coding
-def color_cells(val):
-    if isinstance(val, (int, float)):
-        if val > 0:
-            return 'background-color: #1e3a1e; color: #90ee90'
-        elif val < 0:
-            return 'background-color: #3a1e1e; color: #ff9999'
-    return ''
-
-def color_yield_change(val):
-    """Color yield changes: RED for rising (bad for bonds), GREEN for falling (good for bonds)"""
-    if isinstance(val, (int, float)):
-        if val > 0.1:  # Yields rising
-            return 'background-color: #3a1e1e; color: #ff9999; font-weight: bold'
-        elif val < -0.1:  # Yields falling
-            return 'background-color: #1e3a1e; color: #90ee90; font-weight: bold'
-    return ''
-
-def color_real_rate(val):
-    """Color real rates: RED for negative (loose policy), GREEN for positive/restrictive"""
-    if isinstance(val, (int, float)):
-        if val < -5:  # Very negative (extremely loose)
-            return 'background-color: #4a1e1e; color: #ff6666; font-weight: bold'
-        elif val < 0:  # Negative (loose policy)
-            return 'background-color: #3a1e1e; color: #ff9999'
-        elif val > 3:  # Very positive (very restrictive)
-            return 'background-color: #1e4a1e; color: #66ff66; font-weight: bold'
-        elif val > 0:  # Positive (restrictive)
-            return 'background-color: #1e3a1e; color: #90ee90'
-    return ''
-
-# Display options
-display_cols = st.multiselect(
-    "Select columns to display:",
-    options=['Flag', 'Country', 'Index', 'Price', '1M %', '3M %', 'YTD %', 'FX 1M %', '10Y Yield', 'Yield Δ', 'Inflation', 'Real Rate', 'Policy Rate', 'Term Premium'],
-    default=['Flag', 'Country', 'Index', '1M %', 'YTD %', 'FX 1M %', '10Y Yield', 'Yield Δ', 'Inflation', 'Real Rate', 'Policy Rate']
-)
+    st.markdown("### 📋 Complete Market Overview")
+    market_overview(snapshot)
 
-if display_cols:
-    display_df = df[display_cols].copy()
-    
-    # Format numbers
-    format_dict = {}
-    if '1M %' in display_cols:
-        format_dict['1M %'] = '{:.1f}%'
-    if '3M %' in display_cols:
-        format_dict['3M %'] = '{:.1f}%'
-    if 'YTD %' in display_cols:
-        format_dict['YTD %'] = '{:.1f}%'
-    if 'FX 1M %' in display_cols:
-        format_dict['FX 1M %'] = '{:.1f}%'
-    if '10Y Yield' in display_cols:
-        format_dict['10Y Yield'] = '{:.1f}%'
-    if 'Yield Δ' in display_cols:
-        format_dict['Yield Δ'] = '{:+.1f}bp'  # Show + or - sign
-    if 'Inflation' in display_cols:
-        format_dict['Inflation'] = '{:.1f}%'
-    if 'Real Rate' in display_cols:
-        format_dict['Real Rate'] = '{:+.1f}%'  # Show + or - sign
-    if 'Policy Rate' in display_cols:
-        format_dict['Policy Rate'] = '{:.2f}%'
-    if 'Term Premium' in display_cols:
-        format_dict['Term Premium'] = '{:.1f}pp'
-    
-    # Apply styling
-    styled_df = display_df.style
-    
-    # Color performance columns (green = good, red = bad)
-    perf_cols = [col for col in ['1M %', '3M %', 'YTD %', 'FX 1M %'] if col in display_cols]
-    if perf_cols:
-        styled_df = styled_df.applymap(color_cells, subset=perf_cols)
-    
-    # Color yield changes (RED = rising, GREEN = falling)
-    if 'Yield Δ' in display_cols:
-        styled_df = styled_df.applymap(color_yield_change, subset=['Yield Δ'])
-    
-    # Color real rates (RED = negative/loose, GREEN = positive/tight)
-    if 'Real Rate' in display_cols:
-        styled_df = styled_df.applymap(color_real_rate, subset=['Real Rate'])
-    
-    if format_dict:
-        styled_df = styled_df.format(format_dict)
-    
-    st.dataframe(styled_df, use_container_width=True, height=600)
-else:
-    st.warning("Please select at least one column to display")
-
-# Download button
-csv = df.to_csv(index=False)
-st.download_button(
-    "📥 Download Full Data (CSV)",
-    csv,
-    f"sphaera_em_{datetime.now().strftime('%Y%m%d')}.csv",
-    "text/csv"
-)
+market_board(snapshot)
 
 st.markdown("---")
 
@@ -433,217 +354,148 @@ st.markdown("---")
 
 st.markdown("### 📊 Visual Analysis")
 
-chart_type = st.radio(
-    "Select chart type:",
-    ["1-Month Performance", "YTD Performance", "FX Performance", "Yield Comparison", "Yield Changes", "Real Rates", "Term Premium"],
-    horizontal=True
-)
-
-if chart_type == "1-Month Performance":
-    # Filter valid data
-    chart_data = df[df['1M %'] != 0.0].sort_values('1M %')
-    
-    fig = px.bar(
-        chart_data,
-        y='Country',
-        x='1M %',
-        orientation='h',
-        title='1-Month Index Performance (%)',
-        color='1M %',
-        color_continuous_scale=['red', 'yellow', 'green'],
-        text='1M %'
+@st.fragment
+def visual_analysis(snapshot):
+    chart_type = st.radio(
+        "Select chart type:",
+        CHART_TYPES,
+        horizontal=True
     )
-    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-    fig.update_layout(height=600, showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
 
-elif chart_type == "YTD Performance":
-    # Filter valid data
-    chart_data = df[df['YTD %'] != 0.0].sort_values('YTD %')
-    
-    fig = px.bar(
-        chart_data,
-        y='Country',
-        x='YTD %',
-        orientation='h',
-        title=f'Year-to-Date Performance (Since Jan 1, {datetime.now().year}) (%)',
-        color='YTD %',
-        color_continuous_scale=['red', 'yellow', 'green'],
-        text='YTD %'
-    )
-    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-    fig.update_layout(height=600, showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    METRICS.inc('cache_lookups_total', cache='chart')
+    fig = get_chart(snapshot.version, chart_type, snapshot.data)
+    with timed('render_chart'):
+        st.plotly_chart(fig, use_container_width=True)
 
-elif chart_type == "FX Performance":
-    chart_data = df[df['FX 1M %'] != 0.0].sort_values('FX 1M %')
-    
-    fig = px.bar(
-        chart_data,
-        y='Country',
-        x='FX 1M %',
-        orientation='h',
-        title='Currency Performance vs USD - 1 Month (%)',
-        color='FX 1M %',
-        color_continuous_scale=['red', 'yellow', 'green'],
-        text='FX 1M %'
-    )
-    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-    fig.update_layout(height=600, showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    # Add explanation
+    if chart_type == "Yield Changes":
+        st.info("""
+        **How to read this chart:**
+        - 🔴 **RED bars (right)** = Yields RISING = Bond prices falling = Tightening conditions
+        - 🟢 **GREEN bars (left)** = Yields FALLING = Bond prices rising = Easing conditions
+        - **Larger bars** = Bigger moves in yields over the past month
+        """)
+
+    elif chart_type == "Real Rates":
+        st.info("""
+        **How to read this chart:**
+        - 🟢 **GREEN bars (right)** = POSITIVE real rates = Restrictive policy = Fighting inflation
+        - 🔴 **RED bars (left)** = NEGATIVE real rates = Accommodative policy = Inflation exceeding rates
+        - **Zero line** = Neutral policy (policy rate equals inflation)
+        
+        **Examples:**
+        - Turkey at -14%: Policy rate (50%) - Inflation (64%) = Extremely loose despite high rates
+        - Brazil at +6%: Policy rate (10.75%) - Inflation (4.5%) = Very restrictive, suppressing growth
+        """)
 
-elif chart_type == "Yield Comparison":
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        name='10-Year Yield',
-        x=df['Country'],
-        y=df['10Y Yield'],
-        marker_color='lightblue',
-        text=df['10Y Yield'],
-        texttemplate='%{text:.1f}%',
-        textposition='outside'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Policy Rate',
-        x=df['Country'],
-        y=df['Policy Rate'],
-        marker_color='lightgreen',
-        text=df['Policy Rate'],
-        texttemplate='%{text:.1f}%',
-        textposition='outside'
-    ))
-    
-    fig.update_layout(
-        title='10-Year Yields vs Policy Rates',
-        barmode='group',
-        height=600,
-        xaxis_tickangle=-45
-    )
-    st.plotly_chart(fig, use_container_width=True)
+visual_analysis(snapshot)
 
-elif chart_type == "Yield Changes":
-    # Sort by yield change magnitude
-    chart_data = df.sort_values('Yield Δ')
-    
-    # Create colors: red for positive (rising yields), green for negative (falling)
-    colors = ['#ff4444' if x > 0 else '#44ff44' if x < 0 else '#888888' 
-              for x in chart_data['Yield Δ']]
-    
-    # Create direction indicators based on yield change
-    directions = ['↑ Rising' if x > 0.1 else '↓ Falling' if x < -0.1 else '→ Flat' 
-                  for x in chart_data['Yield Δ']]
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=chart_data['Yield Δ'],
-        y=chart_data['Country'],
-        orientation='h',
-        marker_color=colors,
-        text=chart_data['Yield Δ'],
-        texttemplate='%{text:+.1f}bp',
-        textposition='outside',
-        customdata=directions,
-        hovertemplate='<b>%{y}</b><br>' +
-                      'Yield Change: %{x:+.1f}bp<br>' +
-                      'Trend: %{customdata}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        title='10-Year Yield Changes (1 Month)<br><sub>🔴 RED = Rising Yields (Bad for Bonds) | 🟢 GREEN = Falling Yields (Good for Bonds)</sub>',
-        xaxis_title='Basis Points Change',
-        yaxis_title='',
-        height=600,
-        showlegend=False,
-        # Add vertical line at zero
-        shapes=[dict(
-            type='line',
-            x0=0, x1=0,
-            y0=-0.5, y1=len(chart_data)-0.5,
-            line=dict(color='white', width=2, dash='dash')
-        )]
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Add explanation
-    st.info("""
-    **How to read this chart:**
-    - 🔴 **RED bars (right)** = Yields RISING = Bond prices falling = Tightening conditions
-    - 🟢 **GREEN bars (left)** = Yields FALLING = Bond prices rising = Easing conditions
-    - **Larger bars** = Bigger moves in yields over the past month
-    """)
+st.markdown("---")
 
-elif chart_type == "Real Rates":
-    # Sort by real rate
-    chart_data = df.sort_values('Real Rate')
-    
-    # Create colors: green for positive (tight policy), red for negative (loose policy)
-    colors = ['#44ff44' if x > 3 else '#90ee90' if x > 0 else '#ff9999' if x > -5 else '#ff4444' 
-              for x in chart_data['Real Rate']]
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=chart_data['Real Rate'],
-        y=chart_data['Country'],
-        orientation='h',
-        marker_color=colors,
-        text=chart_data['Real Rate'],
-        texttemplate='%{text:+.1f}%',
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>' +
-                      'Real Rate: %{x:+.1f}%<br>' +
-                      'Policy Rate: ' + chart_data['Policy Rate'].astype(str) + '%<br>' +
-                      'Inflation: ' + chart_data['Inflation'].astype(str) + '%<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        title='Real Policy Rates (Policy Rate - Inflation)<br><sub>🟢 GREEN = Restrictive (Positive) | 🔴 RED = Accommodative (Negative)</sub>',
-        xaxis_title='Real Rate (%)',
-        yaxis_title='',
-        height=600,
-        showlegend=False,
-        # Add vertical line at zero
-        shapes=[dict(
-            type='line',
-            x0=0, x1=0,
-            y0=-0.5, y1=len(chart_data)-0.5,
-            line=dict(color='white', width=2, dash='dash')
-        )]
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Add explanation
-    st.info("""
-    **How to read this chart:**
-    - 🟢 **GREEN bars (right)** = POSITIVE real rates = Restrictive policy = Fighting inflation
-    - 🔴 **RED bars (left)** = NEGATIVE real rates = Accommodative policy = Inflation exceeding rates
-    - **Zero line** = Neutral policy (policy rate equals inflation)
-    
-    **Examples:**
-    - Turkey at -14%: Policy rate (50%) - Inflation (64%) = Extremely loose despite high rates
-    - Brazil at +6%: Policy rate (10.75%) - Inflation (4.5%) = Very restrictive, suppressing growth
-    """)
+# ============================================================================
+# ANALYTICS
+# ============================================================================
 
-elif chart_type == "Term Premium":
-    chart_data = df.sort_values('Term Premium')
-    
-    fig = px.bar(
-        chart_data,
-        x='Country',
-        y='Term Premium',
-        title='Term Premium (10Y Yield - Policy Rate)',
-        color='Term Premium',
-        color_continuous_scale=['blue', 'yellow', 'red'],
-        text='Term Premium'
-    )
-    fig.update_traces(texttemplate='%{text:.1f}pp', textposition='outside')
-    fig.update_layout(height=600, xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+st.markdown("### 🔬 Analytics")
+
+# One engine per ticker set, shared by every session and fed only the bars the
+# price store gained since its last refresh
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_risk_engine(tickers):
+    return RiskEngine(tickers)
+
+# Correlation engines hold tickers x tickers matrices (128 MB at 2,000 tickers),
+# so only the ticker set in view is kept, one engine per window
+@st.cache_resource(max_entries=len(CORRELATION_WINDOWS), show_spinner=False)
+def get_correlation_engine(tickers, window):
+    return CorrelationEngine(tickers, window)
+
+def replay_engine(engine_type, archive, as_of, tickers, *args):
+    close = archive.window(tickers, as_of - pd.Timedelta(days=HISTORY_DAYS), as_of)
+    engine = engine_type(tickers, *args)
+    engine.update(close)
+    return engine
+
+# Replays are keyed on the archive's version as well, so a rebuilt archive
+# swapped in from the background replaces figures computed from the old one
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_replay_risk(as_of, tickers, version, _archive):
+    return replay_engine(RiskEngine, _archive, as_of, tickers).table()
+
+# Replays keep only the finished matrix, not the engine behind it
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_replay_correlation(as_of, tickers, window, version, _archive):
+    return replay_engine(CorrelationEngine, _archive, as_of, tickers, window).matrix()
+
+def replay_archive():
+    history, _ = get_local_sources()
+    return load_archive(history.store)  # a store write since its build swaps in a new one in the background
+
+def replaying():
+    return as_of is not None and as_of < date.today()
+
+def risk_table(markets):
+    """Risk statistics for the instruments in view, live or as of the replay date"""
+    tickers = tuple(market_tickers(markets))
+    if replaying():
+        archive = replay_archive()
+        table = get_replay_risk(pd.Timestamp(as_of), tickers, archive.source_modified_at, archive)
+    else:
+        history, _ = get_local_sources()
+        table = get_risk_engine(tickers).refresh(history, history_start()).table()
+    return risk_by_country(table, markets)
+
+def correlation_matrix(markets, window):
+    """(correlation matrix, revision) for the instruments in view, live or as of the replay date.
+
+    The revision is the live engine's, or the version of the archive a replay was computed from.
+    """
+    tickers = tuple(market_tickers(markets))
+    if replaying():
+        archive = replay_archive()
+        version = archive.source_modified_at
+        return get_replay_correlation(pd.Timestamp(as_of), tickers, window, version, archive), version
+    history, _ = get_local_sources()
+    engine = get_correlation_engine(tickers, window).refresh(history, history_start())
+    return engine.matrix(), engine.revision
+
+# Keyed on the replay date and the engine's (or replayed archive's) revision, so
+# a figure is only rebuilt once new bars land or a rebuilt archive swaps in
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_heatmap(tickers, replay_date, revision, window, _matrix, _labels):
+    METRICS.inc('cache_misses_total', cache='heatmap')
+    return build_correlation_heatmap(_matrix, _labels, window)
+
+@st.fragment
+def analytics(snapshot):
+    markets = universe.subset(snapshot.data['Country']).markets
+    risk_tab, corr_tab = st.tabs(["⚠️ Risk", "🔗 Correlation"])
+
+    with risk_tab:
+        with timed('render_risk'):
+            risk = risk_table(markets)
+            st.dataframe(style_table(risk, list(risk.columns)).styler(), use_container_width=True, height=600, hide_index=True)
+        st.info("""
+        **How to read this table:**
+        - **Vol 1M / 3M** = Annualized realized volatility of daily log returns
+        - **Max DD 1Y** = Worst peak-to-trough fall over the past year; **Drawdown** = Distance below that year's peak today
+        - **1M Z** = Latest 1-month return vs every 1-month return over the past year (beyond ±2 is unusual)
+        """)
+
+    with corr_tab:
+        window = st.radio("Window", list(CORRELATION_WINDOWS), index=1, horizontal=True, key='correlation_window')
+        matrix, revision = correlation_matrix(markets, window)
+        fig = get_heatmap(tuple(matrix.index), as_of if replaying() else None, revision, window, matrix, instrument_labels(markets))
+        with timed('render_heatmap'):
+            st.plotly_chart(fig, use_container_width=True)
+        st.info("""
+        **How to read this chart:**
+        - Correlation of daily log returns over the window: equity indices first, then currencies (quoted per USD)
+        - 🔴 **Red** = Moving together (+1) | 🔵 **Blue** = Moving apart (-1)
+        - Pairs are measured over the days both have prices; blank cells have under three shared days
+        """)
+
+analytics(snapshot)
 
 st.markdown("---")
 
@@ -653,25 +505,12 @@ st.markdown("---")
 
 with st.sidebar:
     # Sidebar logo (icon version - cleaner for sidebar)
-    @st.cache_data
-    def get_sidebar_logo():
-        """Load sidebar icon"""
-        try:
-            with open('/mnt/user-data/outputs/sphaera_icon_150.png', 'rb') as f:
-                return base64.b64encode(f.read()).decode()
-        except:
-            try:
-                with open('sphaera_icon_150.png', 'rb') as f:
-                    return base64.b64encode(f.read()).decode()
-            except:
-                return None
-    
-    sidebar_logo = get_sidebar_logo()
+    sidebar_logo = static_url('sphaera_icon_150.png')
     
     if sidebar_logo:
         st.markdown(f"""
             <div style='text-align: center; padding: 15px 10px;'>
-                <img src='data:image/png;base64,{sidebar_logo}' 
+                <img src='{sidebar_logo}' 
                      style='width: 140px; border-radius: 8px;' 
                      alt='SPHAERA'/>
                 <p style='font-size: 18px; color: #60A5FA; font-weight: 600; margin-top: 12px; margin-bottom: 2px; letter-spacing: 1px;'>
@@ -689,21 +528,22 @@ with st.sidebar:
     
     st.markdown("### ⚙️ Controls")
     
-    if st.button("🔄 Refresh All Data", use_container_width=True):
-        st.cache_data.clear()
+    if st.button("🔄 Refresh All Data", use_container_width=True, disabled=not region_caches):
+        with st.spinner("Refreshing..."):
+            # Selected regions refresh in parallel
+            with ThreadPoolExecutor(len(region_caches)) as pool:
+                list(pool.map(lambda cache: cache.refresh(timeout=60), region_caches.values()))
         st.rerun()
     
     st.markdown("---")
     
     st.markdown("### 📊 Coverage")
+    region_lines = '\n'.join(f"    - {region}: {count}" for region, count in universe.region_counts().items())
     st.markdown(f"""
-    **Total Countries:** {len(EM_MARKETS)}
+    **Total Countries:** {len(universe)}
     
     **Regions:**
-    - Latin America: 5
-    - Asia: 9 (incl. Taiwan & Japan)
-    - EMEA: 6 (incl. Hungary)
-    - Africa: 4
+{region_lines}
     
     **Data Points:**
     - Equity Indices
@@ -717,7 +557,7 @@ with st.sidebar:
     st.markdown("---")
     
     st.markdown("### 📝 Data Updates")
-    st.markdown("""
+    st.markdown(f"""
     **Automatic (Real-time):**
     - Index prices
     - FX rates
@@ -726,11 +566,25 @@ with st.sidebar:
     - 10Y yields
     - Policy rates
     
-    **Refresh:** Every 5 minutes
+    **Refresh:** Every 5 minutes (📡 Live: every {LIVE_SECONDS}s)
     """)
     
     st.markdown("---")
     
+    # Optional diagnostics: where the time goes (network, build, styling, charts)
+    if st.checkbox("🩺 Show diagnostics"):
+        histograms, counters = METRICS.summary()
+        st.markdown("**Stage latency (ms)**")
+        st.dataframe(histograms, hide_index=True, use_container_width=True)
+        st.markdown("**Counters**")
+        st.dataframe(counters, hide_index=True, use_container_width=True)
+        st.markdown("**History cache**")
+        st.dataframe([get_history().footprint()], hide_index=True, use_container_width=True)
+        st.download_button("📥 Prometheus metrics", METRICS.to_prometheus(), "sphaera_metrics.prom", "text/plain")
+        st.download_button("📥 JSON log records", METRICS.to_json_lines(), "sphaera_metrics.jsonl", "application/json")
+    
+    st.markdown("---")
+    
     st.markdown("### ℹ️ About")
     st.markdown("""
     **SPHAERA Global Research**
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules live at the repo root, as for the app and benchmarks/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,133 @@
+"""Incremental risk and correlation engines vs a full recomputation of the same bars"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import (
+    CORRELATION_WINDOWS, DRAWDOWN_WINDOW, RISK_COLUMNS, TRADING_DAYS, VOL_WINDOWS,
+    ZSCORE_HISTORY, ZSCORE_HORIZON, CorrelationEngine, RiskEngine,
+)
+from price_store import PriceStore
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD']
+
+
+def history(bars=400, seed=0):
+    """Random-walk Closes on business days, with gaps like other markets' holidays and a late listing"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2025-01-01', periods=bars, name='Date')
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.015, (bars, len(TICKERS))), axis=0)),
+                         index=dates, columns=TICKERS)
+    close = close.mask(rng.random(close.shape) < 0.05)
+    close.iloc[:150, 3] = np.nan
+    return close
+
+
+def revise_last(close, factor=1.03):
+    """The same history with the last bar's prints moved, as when an intraday bar settles"""
+    close = close.copy()
+    close.iloc[-1] *= factor
+    return close
+
+
+def reference_risk(close):
+    """RISK_COLUMNS from scratch with pandas, over the whole history"""
+    prices = close.ffill()
+    log_returns = np.log(prices / prices.shift())
+    monthly = np.log(prices / prices.shift(ZSCORE_HORIZON)).tail(ZSCORE_HISTORY)
+    window = prices.tail(DRAWDOWN_WINDOW)
+    return pd.DataFrame({
+        **{f'Vol {label} %': log_returns.tail(bars).std() * np.sqrt(TRADING_DAYS) * 100 for label, bars in VOL_WINDOWS.items()},
+        'Max DD 1Y %': -(1 - window / window.cummax()).max() * 100,
+        'Drawdown %': -(1 - prices.iloc[-1] / window.max()) * 100,
+        '1M Z': (monthly.iloc[-1] - monthly.mean()) / monthly.std(),
+    })[RISK_COLUMNS].round(2)
+
+
+def reference_correlation(close, window):
+    prices = close.ffill()
+    return np.log(prices / prices.shift()).tail(CORRELATION_WINDOWS[window]).corr(min_periods=3)
+
+
+def feed(engine, close, chunks=(1, 5, 40, 300)):
+    """Feed bars in uneven chunks, re-sending the last bar seen each time like a store refresh"""
+    start = 0
+    for size in chunks:
+        end = min(start + size, len(close))
+        engine.update(close.iloc[max(start - 1, 0):end])
+        start = end
+    engine.update(close.iloc[max(start - 1, 0):])
+    return engine
+
+
+def test_risk_matches_full_recompute():
+    close = history()
+    table = feed(RiskEngine(TICKERS), close).table()
+    pd.testing.assert_frame_equal(table, reference_risk(close), atol=0.011)
+
+
+@pytest.mark.parametrize('window', list(CORRELATION_WINDOWS))
+def test_correlation_matches_full_recompute(window):
+    close = history()
+    matrix = feed(CorrelationEngine(TICKERS, window), close).matrix()
+    np.testing.assert_allclose(matrix, reference_correlation(close, window), atol=1e-12)
+
+
+@pytest.mark.parametrize('factor', [1.03, 0.9, 1.5])
+def test_revised_last_bar_replaces_first_print(factor):
+    close = history()
+    risk = feed(RiskEngine(TICKERS), close)
+    correlation = feed(CorrelationEngine(TICKERS, '1M'), close)
+    revised = revise_last(close, factor)
+
+    # The store re-sends the last bar with its settled value, alone or with newer bars
+    assert risk.update(revised.iloc[-1:]) == 1
+    assert correlation.update(revised.iloc[-1:]) == 1
+    pd.testing.assert_frame_equal(risk.table(), reference_risk(revised), atol=0.011)
+    pd.testing.assert_frame_equal(risk.table(), feed(RiskEngine(TICKERS), revised).table())
+    np.testing.assert_allclose(correlation.matrix(), reference_correlation(revised, '1M'), atol=1e-12)
+
+
+def test_revision_then_new_bars():
+    close = history(bars=300)
+    engine = feed(RiskEngine(TICKERS), close.iloc[:-3])
+    correlation = feed(CorrelationEngine(TICKERS, '3M'), close.iloc[:-3])
+    revised = pd.concat([revise_last(close.iloc[:-3], 0.95), close.iloc[-3:]])
+
+    assert engine.update(revised.iloc[-4:]) == 4
+    assert correlation.update(revised.iloc[-4:]) == 4
+    pd.testing.assert_frame_equal(engine.table(), reference_risk(revised), atol=0.011)
+    np.testing.assert_allclose(correlation.matrix(), reference_correlation(revised, '3M'), atol=1e-12)
+
+
+def test_late_bar_on_another_calendar():
+    close = history(bars=200)
+    early = close.copy()
+    early.iloc[-1, 1] = np.nan    # BBB's market hadn't closed yet
+    engine = feed(RiskEngine(TICKERS), early)
+    engine.update(close.iloc[-1:])
+    pd.testing.assert_frame_equal(engine.table(), reference_risk(close), atol=0.011)
+
+
+def test_unchanged_last_bar_is_not_refed():
+    close = history(bars=100)
+    engine = feed(RiskEngine(TICKERS), close)
+    revision = engine.revision
+    assert engine.update(close.iloc[-1:]) == 0
+    assert engine.revision == revision
+
+
+def test_refresh_picks_up_revised_close(tmp_path):
+    close = history(bars=120)
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(close)
+    risk = RiskEngine(TICKERS).refresh(store, close.index[0])
+    correlation = CorrelationEngine(TICKERS, '1M').refresh(store, close.index[0])
+
+    revised = revise_last(close)
+    store.save(revised.iloc[-1:])
+    risk.refresh(store, close.index[0])
+    correlation.refresh(store, close.index[0])
+    pd.testing.assert_frame_equal(risk.table(), reference_risk(revised), atol=0.011)
+    np.testing.assert_allclose(correlation.matrix(), reference_correlation(revised, '1M'), atol=1e-12)
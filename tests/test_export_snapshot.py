@@ -0,0 +1,38 @@
+"""Headless snapshot exports and the dashboard's warm start from them"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from export_snapshot import read_latest_snapshot, write_snapshot
+
+
+def table(as_of, stale):
+    return pd.DataFrame({
+        'Country': ['Brazil', 'Chile', 'Peru'],
+        '1M %': [1.5, -2.0, None],
+        'As Of': pd.to_datetime(as_of),
+        'Stale': stale,
+    })
+
+
+def test_newest_export_wins_across_formats(tmp_path):
+    old = table(['2026-10-01'] * 3, [False] * 3)
+    new = table(['2026-10-15'] * 3, [False] * 3)
+    write_snapshot(old, tmp_path, ['parquet', 'json'], datetime(2026, 10, 1, tzinfo=timezone.utc))
+    write_snapshot(new, tmp_path, ['csv', 'json'], datetime(2026, 10, 15, tzinfo=timezone.utc))
+
+    df, updated_at = read_latest_snapshot(tmp_path, now='2026-10-16')
+    assert updated_at == datetime(2026, 10, 15, tzinfo=timezone.utc)
+    assert df['As Of'].max() == pd.Timestamp('2026-10-15')
+
+
+def test_stale_flags_are_reevaluated_when_read(tmp_path):
+    df = table(['2026-10-15', '2026-10-08', None], [False, False, True])
+    write_snapshot(df, tmp_path, ['json'], datetime(2026, 10, 15, tzinfo=timezone.utc))
+
+    fresh, _ = read_latest_snapshot(tmp_path, now='2026-10-15')
+    assert fresh['Stale'].tolist() == [False, True, True]
+
+    later, _ = read_latest_snapshot(tmp_path, now='2026-10-25')
+    assert later['Stale'].tolist() == [True, True, True]
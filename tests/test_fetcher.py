@@ -0,0 +1,66 @@
+"""Concurrent fetches: per-ticker timeouts"""
+
+import threading
+import time
+
+import pytest
+
+import fetcher
+from fetcher import fetch_concurrently
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(fetcher, 'rate_limiter', lambda host=None: fetcher.TokenBucket(rate=1e6, capacity=1e6))
+
+
+def sleeper(seconds, release=None):
+    """fetch_one that takes seconds[ticker], or until `release` is set for 'HUNG'"""
+    def fetch_one(ticker):
+        if ticker == 'HUNG':
+            release.wait(5)
+        else:
+            time.sleep(seconds.get(ticker, 0))
+        return ticker.lower()
+    return fetch_one
+
+
+def test_timeout_is_per_ticker_from_when_it_starts():
+    # One worker: each ticker takes under the timeout, all of them together well over it
+    seconds = {'AAA': 0.15, 'BBB': 0.15, 'CCC': 0.15, 'DDD': 0.15}
+    results = fetch_concurrently(list(seconds), sleeper(seconds), max_workers=1, timeout=0.3)
+    assert results == {'AAA': 'aaa', 'BBB': 'bbb', 'CCC': 'ccc', 'DDD': 'ddd'}
+
+
+def test_hung_ticker_is_dropped_at_its_own_deadline():
+    release = threading.Event()
+    tickers = ['HUNG', 'AAA', 'BBB', 'CCC', 'DDD', 'EEE', 'FFF']
+    try:
+        t0 = time.monotonic()
+        results = fetch_concurrently(tickers, sleeper({}, release), max_workers=2, timeout=0.2)
+        elapsed = time.monotonic() - t0
+    finally:
+        release.set()
+    assert results == {ticker: ticker.lower() for ticker in tickers[1:]}
+    assert elapsed < 0.5    # not timeout x batches (0.8s)
+
+
+def test_no_busy_wait_for_a_ticker_running_past_give_up(monkeypatch):
+    # One worker: SLOW0 overruns its timeout and holds the worker, so SLOW1
+    # starts just before the overall give-up and keeps running past it
+    calls = []
+    real_wait = fetcher.wait
+
+    def counting_wait(*args, **kwargs):
+        calls.append(kwargs.get('timeout'))
+        return real_wait(*args, **kwargs)
+
+    monkeypatch.setattr(fetcher, 'wait', counting_wait)
+    seconds = {'SLOW0': 0.5, 'SLOW1': 1.0}
+    t0 = time.monotonic()
+    results = fetch_concurrently(list(seconds), sleeper(seconds), max_workers=1, timeout=0.3)
+    elapsed = time.monotonic() - t0
+
+    assert results == {}
+    assert 0.75 < elapsed < 1.0     # SLOW1 dropped at its own deadline (~0.8s), past give-up (0.6s)
+    assert len(calls) < 30          # polls while SLOW1 is queued, then one wait per deadline
@@ -0,0 +1,54 @@
+"""The history cache against the price store it fronts"""
+
+import numpy as np
+import pandas as pd
+
+from history_cache import HistoryCache
+from price_store import PriceStore
+
+
+class InterleavedStore(PriceStore):
+    """A PriceStore that runs `during_load` between reading and returning, like a slow read overtaken by a save"""
+
+    during_load = None
+
+    def load(self, tickers, start=None):
+        close = super().load(tickers, start)
+        if self.during_load is not None:
+            during_load, self.during_load = self.during_load, None
+            during_load()
+        return close
+
+
+def closes(dates, value):
+    return pd.DataFrame({'AAA': value}, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+def test_save_during_load_is_not_overwritten(tmp_path):
+    dates = pd.bdate_range('2026-09-01', '2026-10-16')
+    store = InterleavedStore(str(tmp_path / 'prices.sqlite'))
+    store.save(closes(dates[:-5], 100.0))
+    cache = HistoryCache(store)
+
+    store.during_load = lambda: cache.save(closes(dates[-5:], 101.0))
+    cache.load(['AAA'], dates[0])
+
+    # The read overtaken by the save wasn't cached: later loads see the saved bars
+    close = cache.load(['AAA'], dates[0])
+    assert close.index[-1] == dates[-1]
+    assert close['AAA'].iloc[-1] == np.float32(101.0)
+    pd.testing.assert_index_equal(close.index, store.load(['AAA'], dates[0]).index)
+
+
+def test_loads_are_cached_and_saves_patch_them(tmp_path):
+    dates = pd.bdate_range('2026-09-01', '2026-10-16')
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(closes(dates[:-1], 100.0))
+    cache = HistoryCache(store)
+
+    cache.load(['AAA'], dates[0])
+    cache.save(closes(dates[-2:], 102.0))
+    close = cache.load(['AAA'], dates[0])
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert list(close['AAA'].iloc[-2:]) == [102.0, 102.0]
+    assert close.index[-1] == dates[-1]
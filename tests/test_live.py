@@ -0,0 +1,89 @@
+"""Live quotes applied row by row, checked against a full table rebuild"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from live import LiveBoard
+from macro_store import MacroHistory
+from market_data import build_dashboard_data, market_tickers
+from snapshot import MarketSnapshot
+
+TODAY = pd.Timestamp('2026-10-16')
+
+MARKETS = {
+    'Alpha': {'index': 'AAA', 'currency': 'AAA=X', 'flag': '🏳️'},
+    'Beta': {'index': 'BBB', 'currency': 'BBB=X', 'flag': '🏳️'},
+    'Gamma': {'index': 'N/A', 'currency': 'GGG=X', 'flag': '🏳️'},
+    'Delta': {'index': 'DDD', 'currency': 'SHR=X', 'flag': '🏳️'},     # shares its currency
+    'Epsilon': {'index': 'EEE', 'currency': 'SHR=X', 'flag': '🏳️'},
+    'Zeta': {'index': 'ZZZ', 'currency': 'ZZZ=X', 'flag': '🏳️'},
+}
+
+
+def fixture():
+    tickers = market_tickers(MARKETS)
+    dates = pd.bdate_range(TODAY - pd.Timedelta(days=420), TODAY - pd.Timedelta(days=1))
+    rng = np.random.default_rng(7)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), len(tickers))), axis=0)),
+                         index=dates, columns=tickers)
+    close.iloc[-10:, tickers.index('EEE')] = np.nan     # stale until a quote arrives
+    close.iloc[-1, tickers.index('BBB=X')] = np.nan     # currency a day behind its index
+    macro = MacroHistory(pd.DataFrame(
+        [(TODAY - pd.DateOffset(months=m), country, field, 5.0 + m)
+         for m in range(3) for country in MARKETS for field in ('yield_10y', 'policy_rate', 'inflation')],
+        columns=['date', 'country', 'field', 'value'],
+    ))
+    snapshot = MarketSnapshot(1, datetime.now(timezone.utc), build_dashboard_data(MARKETS, macro, close, now=TODAY))
+    return close, macro, snapshot
+
+
+def quotes(prices, dates=None):
+    data = pd.DataFrame({'Price': pd.Series(prices, dtype=float), 'Date': TODAY})
+    if dates:
+        data.loc[list(dates), 'Date'] = list(dates.values())
+    return MarketSnapshot(('quotes', len(prices)), datetime.now(timezone.utc), data)
+
+
+def rebuilt(close, macro, prices):
+    """The table build_dashboard_data makes with today's prints as one more bar"""
+    today = pd.DataFrame([prices], index=[TODAY]).reindex(columns=close.columns)
+    return build_dashboard_data(MARKETS, macro, pd.concat([close, today]), now=TODAY)
+
+
+def test_apply_matches_a_full_rebuild():
+    close, macro, snapshot = fixture()
+    board = LiveBoard(snapshot, MARKETS, close, today=TODAY)
+    last = close.ffill().iloc[-1]
+    prices = {'AAA': last['AAA'] * 1.03, 'GGG=X': last['GGG=X'] * 0.98, 'SHR=X': last['SHR=X'] * 1.01,
+              'EEE': last['EEE'] * 1.05, 'BBB=X': last['BBB=X'] * 1.02}
+
+    live, _ = board.apply(quotes(prices))
+
+    pd.testing.assert_frame_equal(live.data, rebuilt(close, macro, prices), check_dtype=False)
+    assert not live.data.loc[live.data['Index'] == 'EEE', 'Stale'].any()
+    assert snapshot.data.loc[snapshot.data['Index'] == 'EEE', 'Stale'].all()    # published table untouched
+
+
+def test_unchanged_and_old_quotes_leave_the_snapshot_alone():
+    close, _, snapshot = fixture()
+    board = LiveBoard(snapshot, MARKETS, close, today=TODAY)
+    last = close.ffill().iloc[-1]
+
+    live, summary = board.apply(quotes({'AAA': last['AAA'], 'ZZZ': last['ZZZ'] * 2},
+                                       dates={'ZZZ': TODAY - pd.Timedelta(days=1)}))
+    assert live is snapshot and summary == snapshot.version
+
+
+def test_fx_only_ticks_keep_the_summary_version():
+    close, macro, snapshot = fixture()
+    board = LiveBoard(snapshot, MARKETS, close, today=TODAY)
+    last = close.ffill().iloc[-1]
+
+    first, summary = board.apply(quotes({'AAA': last['AAA'] * 1.01}))
+    prices = {'AAA': last['AAA'] * 1.01, 'ZZZ=X': last['ZZZ=X'] * 1.04}
+    second, fx_summary = board.apply(quotes(prices))
+
+    assert second.version != first.version and fx_summary == summary
+    pd.testing.assert_frame_equal(second.data, rebuilt(close, macro, prices), check_dtype=False)
@@ -0,0 +1,133 @@
+"""Returns, currency decomposition and history top-ups against the local price store"""
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from market_data import HORIZONS, compute_returns, decompose_returns, history_start, refresh_history
+from price_store import PriceStore
+from providers import Provider
+
+
+class RecordingProvider(Provider):
+    """Serves a fixed Close frame and records every history request"""
+
+    def __init__(self, close):
+        self.close = close
+        self.requests = []
+
+    def history(self, tickers, start, end=None):
+        self.requests.append((list(tickers), pd.Timestamp(start)))
+        return self.close.loc[self.close.index >= pd.Timestamp(start), list(tickers)].dropna(how='all')
+
+
+def test_lagging_ticker_does_not_pull_back_the_top_up(tmp_path, monkeypatch):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=300, name='Date')
+    close = pd.DataFrame(np.linspace(100, 130, 300)[:, None] * [1, 2, 3], index=dates, columns=['AAA', 'BBB', 'HALTED'])
+    close.iloc[-140:, 2] = np.nan    # stopped trading 140 bars ago
+
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(close.iloc[:-3])
+    provider = RecordingProvider(close)
+    monkeypatch.setattr(market_data, 'provider', provider)
+
+    history = refresh_history(store, ['AAA', 'BBB', 'HALTED'])
+
+    current, lagging = provider.requests
+    assert current == (['AAA', 'BBB'], dates[-4])
+    assert lagging == (['HALTED'], dates[-141])
+    assert history.index[-1] == dates[-1]
+    assert history.index[0] >= history_start()
+
+
+def test_lagging_ticker_is_retried_only_after_stale_after(tmp_path, monkeypatch):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=300, name='Date')
+    close = pd.DataFrame(np.linspace(100, 130, 300)[:, None] * [1, 2], index=dates, columns=['AAA', 'HALTED'])
+    close.iloc[-140:, 1] = np.nan
+
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(close.iloc[:-3])
+    provider = RecordingProvider(close)
+    monkeypatch.setattr(market_data, 'provider', provider)
+
+    refresh_history(store, ['AAA', 'HALTED'])
+    refresh_history(store, ['AAA', 'HALTED'])
+    assert [tickers for tickers, _ in provider.requests] == [['AAA'], ['HALTED'], ['AAA']]
+
+    # Once STALE_AFTER has passed since the last attempt it is asked again
+    attempt = market_data._lagging_attempts[store.path, 'HALTED']
+    monkeypatch.setitem(market_data._lagging_attempts, (store.path, 'HALTED'), attempt - market_data.STALE_AFTER)
+    refresh_history(store, ['AAA', 'HALTED'])
+    assert [tickers for tickers, _ in provider.requests[3:]] == [['AAA'], ['HALTED']]
+
+
+# ============================================================================
+# RETURNS AND CURRENCY DECOMPOSITION AGAINST A NAIVE REFERENCE
+# ============================================================================
+
+def sparse_close():
+    """Tickers on different calendars, with gaps over year-end and cutoffs, short and empty histories"""
+    dates = pd.bdate_range('2024-11-01', '2026-03-13', name='Date')
+    rng = np.random.default_rng(3)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 6)), axis=0)),
+                         index=dates, columns=['DAILY', 'WEEKLY', 'GAPPY', 'SHORT', 'EMPTY', 'FX=X'])
+    close.loc[close.index.dayofweek != 4, 'WEEKLY'] = np.nan
+    close.loc['2025-12-15':'2026-01-09', 'GAPPY'] = np.nan          # no bar near the YTD base
+    close.loc['2026-02-02':'2026-02-20', 'GAPPY'] = np.nan          # nor the 1M one
+    close.loc[:'2025-09-30', 'SHORT'] = np.nan                      # history short of 6M and 1Y
+    close.loc[close.index[-2:], 'SHORT'] = np.nan                   # and its last bar behind the others
+    close['EMPTY'] = np.nan
+    close.loc[close.index[::3], 'FX=X'] = np.nan
+    return close
+
+
+def cutoff(end, horizon):
+    offset = HORIZONS[horizon]
+    return pd.Timestamp(end.year - 1, 12, 31) if offset is None else end - offset
+
+
+def price_on(series, on):
+    """Last close on or before `on`, NaN if there is none"""
+    series = series.dropna()
+    series = series[series.index <= on]
+    return series.iloc[-1] if len(series) else np.nan
+
+
+def test_returns_use_the_last_close_on_or_before_each_cutoff():
+    close = sparse_close()
+    now = pd.Timestamp('2026-03-16')
+    returns = compute_returns(close, now)
+
+    for ticker in close.columns:
+        series = close[ticker].dropna()
+        row = returns.loc[ticker]
+        if series.empty:
+            assert np.isnan(row['Price']) and row['Stale'] and pd.isna(row['As Of'])
+            continue
+        end = series.index[-1]
+        assert row['Price'] == series.iloc[-1] and row['As Of'] == end
+        assert row['Stale'] == (now - end > market_data.STALE_AFTER)
+        for horizon in HORIZONS:
+            expected = (series.iloc[-1] / price_on(series, cutoff(end, horizon)) - 1) * 100
+            np.testing.assert_allclose(row[f'{horizon} %'], expected, err_msg=f"{ticker} {horizon}")
+
+
+def test_decomposition_matches_usd_and_fx_returns_over_the_index_window():
+    close = sparse_close()
+    index_tickers = ['DAILY', 'WEEKLY', 'GAPPY', 'SHORT', 'EMPTY', 'N/A', 'DAILY', 'MISSING']
+    fx_tickers = ['FX=X', 'FX=X', 'FX=X', 'FX=X', 'FX=X', 'FX=X', 'N/A', 'FX=X']
+    local, fx_contribution = decompose_returns(close, index_tickers, fx_tickers)
+
+    for i, (index, fx) in enumerate(zip(index_tickers, fx_tickers)):
+        series = close[index].dropna() if index in close else pd.Series(dtype=float)
+        for h, horizon in enumerate(HORIZONS):
+            if series.empty or fx not in close:
+                assert np.isnan(local[h, i]) and np.isnan(fx_contribution[h, i]), f"{index}/{fx} {horizon}"
+                continue
+            end = series.index[-1]
+            base = cutoff(end, horizon)
+            usd = series.iloc[-1] / price_on(series, base) - 1
+            fx_return = price_on(close[fx], end) / price_on(close[fx], base) - 1
+            expected = ((1 + usd) * (1 + fx_return) - 1) * 100
+            np.testing.assert_allclose(local[h, i], expected, err_msg=f"{index} {horizon}")
+            np.testing.assert_allclose(fx_contribution[h, i], usd * 100 - expected, err_msg=f"{index} {horizon}")
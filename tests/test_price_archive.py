@@ -0,0 +1,57 @@
+"""Price archive builds and background rebuilds"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+import price_archive
+from price_archive import PriceArchive, load_archive
+from price_store import PriceStore
+
+
+def closes(dates, value):
+    return pd.DataFrame({'AAA': value, 'BBB': value * 2}, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+def wait_for_rebuilds(timeout=10):
+    deadline = time.monotonic() + timeout
+    while price_archive._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not price_archive._rebuilding
+
+
+def test_store_write_rebuilds_in_background(tmp_path):
+    dates = pd.bdate_range('2026-09-01', '2026-10-16')
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(closes(dates[:-1], 100.0))
+    path = str(tmp_path / 'archive')
+
+    first = load_archive(store, path)
+    assert first.dates[-1] == np.datetime64(dates[-2].date())
+
+    time.sleep(0.01)
+    store.save(closes(dates[-1:], 101.0))
+    # The caller gets the archive it had without waiting for the rebuild
+    assert load_archive(store, path) is first
+    wait_for_rebuilds()
+
+    second = load_archive(store, path)
+    assert second is not first
+    assert second.source_modified_at == store.modified_at()
+    assert second.window(['AAA'], dates[-1], dates[-1])['AAA'].tolist() == [101.0]
+    # The archive opened earlier still reads its own generation
+    assert first.window(['AAA'], dates[0], dates[-1]).index[-1] == dates[-2]
+
+
+def test_old_generations_are_pruned(tmp_path):
+    store = PriceStore(str(tmp_path / 'prices.sqlite'))
+    store.save(closes(pd.bdate_range('2026-09-01', '2026-10-16'), 100.0))
+    path = tmp_path / 'archive'
+    (path / 'gen-9999999999999999999').mkdir(parents=True)    # left half-written by a killed build
+    for _ in range(4):
+        archive = PriceArchive.build(store, str(path))
+
+    assert len(list(path.glob('gen-*'))) == 2
+    assert PriceArchive(str(path)).window(['BBB'], '2026-10-16', '2026-10-16')['BBB'].tolist() == [200.0]
+    assert archive.tickers == ['AAA', 'BBB']
@@ -0,0 +1,111 @@
+"""Market data providers: the fallback chain and the local file's reloads"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers import FallbackProvider, LocalFileProvider, Provider, ProviderError, build_provider
+
+DATES = pd.bdate_range('2026-09-01', periods=20, name='Date')
+
+
+class StaticProvider(Provider):
+    """Serves fixed Close columns and quotes, records what it was asked for, or raises"""
+
+    def __init__(self, name, close, fail=False):
+        self.name = name
+        self.close = close
+        self.fail = fail
+        self.asked = []
+
+    def history(self, tickers, start, end=None):
+        self.asked.append(list(tickers))
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return self.close[self.close.index >= pd.Timestamp(start)].reindex(columns=list(tickers))
+
+    def quotes(self, tickers):
+        self.asked.append(list(tickers))
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        last = self.close.iloc[-1].reindex(list(tickers)).dropna()
+        return pd.DataFrame({'Price': last, 'Date': self.close.index[-1]})
+
+
+def column(value, gaps=()):
+    values = np.full(len(DATES), float(value))
+    values[list(gaps)] = np.nan
+    return values
+
+
+def test_fallback_asks_each_provider_only_for_what_earlier_ones_missed():
+    first = StaticProvider('first', pd.DataFrame({'AAA': column(1), 'BBB': column(np.nan)}, index=DATES))
+    second = StaticProvider('second', pd.DataFrame({'AAA': column(2), 'BBB': column(2, gaps=[3]), 'CCC': column(2)}, index=DATES))
+    third = StaticProvider('third', pd.DataFrame({'CCC': column(3), 'DDD': column(3)}, index=DATES))
+
+    close = FallbackProvider([first, second, third]).history(['DDD', 'AAA', 'BBB', 'CCC', 'NOPE'], DATES[0])
+
+    assert first.asked == [['DDD', 'AAA', 'BBB', 'CCC', 'NOPE']]
+    assert second.asked == [['DDD', 'BBB', 'CCC', 'NOPE']]
+    assert third.asked == [['DDD', 'NOPE']]
+    assert list(close.columns) == ['DDD', 'AAA', 'BBB', 'CCC', 'NOPE']
+    assert (close['AAA'] == 1).all() and (close['CCC'] == 2).all() and (close['DDD'] == 3).all()
+    assert np.isnan(close['BBB'].iloc[3]) and close['NOPE'].isna().all()   # gaps are not filled from later providers
+
+
+def test_failing_provider_falls_through_for_every_ticker():
+    down = StaticProvider('down', pd.DataFrame({'AAA': column(1)}, index=DATES), fail=True)
+    backup = StaticProvider('backup', pd.DataFrame({'AAA': column(2), 'BBB': column(2)}, index=DATES))
+    chain = FallbackProvider([down, backup])
+
+    assert (chain.history(['AAA', 'BBB'], DATES[0]) == 2).all(axis=None)
+    assert chain.quotes(['AAA', 'BBB'])['Price'].to_dict() == {'AAA': 2.0, 'BBB': 2.0}
+    assert backup.asked == [['AAA', 'BBB'], ['AAA', 'BBB']]
+
+
+def test_nothing_anywhere_is_an_empty_frame():
+    chain = FallbackProvider([StaticProvider('empty', pd.DataFrame(index=DATES))])
+    close = chain.history(['AAA'], DATES[0])
+    assert close.empty and list(close.columns) == ['AAA']
+    assert chain.quotes(['AAA']).empty
+
+
+def write_csv(path, close, mtime):
+    close.to_csv(path)
+    os.utime(path, (mtime, mtime))
+
+
+def test_local_file_is_reread_only_when_it_changes(tmp_path):
+    path = str(tmp_path / 'local_prices.csv')
+    provider = LocalFileProvider(path)
+    assert provider.history(['AAA'], DATES[0]).empty     # no file yet
+
+    write_csv(path, pd.DataFrame({'AAA': column(1)}, index=DATES), mtime=1_000_000)
+    first = provider._read()
+    assert (provider.history(['AAA'], DATES[5], DATES[10])['AAA'] == 1).all()
+    assert provider._read() is first
+
+    write_csv(path, pd.DataFrame({'AAA': column(5), 'BBB': column(6)}, index=DATES), mtime=1_000_060)
+    close = provider.history(['AAA', 'BBB'], DATES[0])
+    assert (close['AAA'] == 5).all() and (close['BBB'] == 6).all()
+
+
+def test_local_parquet_and_bad_files(tmp_path):
+    parquet = str(tmp_path / 'local_prices.parquet')
+    pd.DataFrame({'AAA': column(4)}, index=DATES).to_parquet(parquet)
+    assert (LocalFileProvider(parquet).history(['AAA'], DATES[0])['AAA'] == 4).all()
+
+    bad = tmp_path / 'bad.csv'
+    bad.write_text("Date,AAA\nnot a date,1\n")
+    with pytest.raises(ProviderError):
+        LocalFileProvider(str(bad)).history(['AAA'], DATES[0])
+
+
+def test_build_provider():
+    assert isinstance(build_provider('local'), LocalFileProvider)
+    chain = build_provider('yfinance, local')
+    assert [provider.name for provider in chain.providers] == ['yfinance', 'local']
+    with pytest.raises(ProviderError):
+        build_provider('yahoo')
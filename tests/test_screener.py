@@ -0,0 +1,103 @@
+"""Screener queries checked against pandas filtering and sorting"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screener import Screen, ScreenIndex
+
+METRICS = ['1M %', 'YTD %', '10Y Yield']
+
+
+def table(rows=53, seed=11):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Flag': ['🏳️'] * rows,
+        'Country': [f'Country {i:02d}' for i in range(rows)],
+        'Index': [f'IDX{i:02d}' for i in range(rows)],
+        # Whole numbers, so there are plenty of ties to keep in table order
+        **{col: rng.integers(-6, 7, rows).astype(float) for col in METRICS},
+        'As Of': pd.Timestamp('2026-10-16'),
+        'Stale': rng.random(rows) < 0.2,
+    })
+    for col in METRICS:
+        df.loc[rng.random(rows) < 0.15, col] = np.nan
+    return df, rng.choice(['Asia', 'Africa', 'Europe'], rows)
+
+
+def reference(df, groups, screen):
+    """Rows a screen should return, all pages, the plain pandas way"""
+    keep = pd.Series(True, index=df.index)
+    if screen.groups:
+        keep &= pd.Series(groups, index=df.index).isin(screen.groups)
+    for column, low, high in screen.ranges:
+        keep &= df[column].notna()
+        if low is not None:
+            keep &= df[column] >= low
+        if high is not None:
+            keep &= df[column] <= high
+    if screen.valid_only:
+        keep &= ~df['Stale'] & df[screen.sort_by].notna()
+    return df[keep].sort_values(screen.sort_by, ascending=not screen.descending, kind='stable', na_position='last')
+
+
+SCREENS = [
+    Screen(sort_by, descending, groups, ranges, valid_only)
+    for sort_by, descending, groups, ranges, valid_only in itertools.product(
+        METRICS, (True, False), ((), ('Asia',), ('Africa', 'Europe')),
+        ((), (('YTD %', -3, None),), (('10Y Yield', None, 2), ('1M %', -4, 4))), (False, True),
+    )
+]
+
+
+@pytest.mark.parametrize('page_size', [1, 7, 10, 100])
+def test_every_page_matches_pandas(page_size):
+    df, groups = table()
+    index = ScreenIndex(df, groups)
+    for screen in SCREENS:
+        expected = reference(df, groups, screen)
+        pages = max(-(-len(expected) // page_size), 1)
+        for page in range(pages):
+            result = index.query(Screen(**{**screen.__dict__, 'page': page, 'page_size': page_size}))
+            assert (result.total, result.page, result.pages) == (len(expected), page, pages)
+            pd.testing.assert_frame_equal(result.data, expected.iloc[page * page_size:(page + 1) * page_size])
+
+
+def test_pages_out_of_range_are_clamped():
+    df, groups = table()
+    index = ScreenIndex(df, groups)
+    expected = reference(df, groups, Screen('YTD %'))
+
+    last = index.query(Screen('YTD %', page=99, page_size=10))
+    assert (last.page, last.pages) == (5, 6)
+    pd.testing.assert_frame_equal(last.data, expected.iloc[50:])
+    pd.testing.assert_frame_equal(index.query(Screen('YTD %', page=-1, page_size=10)).data, expected.iloc[:10])
+
+    nothing = index.query(Screen('YTD %', ranges=(('1M %', 100, None),), page=3))
+    assert (nothing.total, nothing.page, nothing.pages, len(nothing.data)) == (0, 0, 1, 0)
+
+
+def test_top_bounds_and_summary_match_pandas():
+    df, _ = table()
+    index = ScreenIndex(df)
+    for col in METRICS:
+        assert index.top(col).name == df[col].idxmax()
+        assert index.top(col, descending=False).name == df[col].idxmin()
+        assert index.bounds(col) == (df[col].min(), df[col].max())
+
+    summary = index.summary()
+    valid = df['1M %'].dropna()
+    assert summary['best_1m'].name == valid.idxmax() and summary['worst_1m'].name == valid.idxmin()
+    assert (summary['avg_1m'], summary['positive_1m'], summary['valid_1m']) == (valid.mean(), (valid > 0).sum(), len(valid))
+
+
+def test_metric_without_values():
+    df, _ = table(rows=5)
+    df['YTD %'] = np.nan
+    index = ScreenIndex(df)
+    assert index.top('YTD %') is None and index.bounds('YTD %') is None
+    assert index.query(Screen('YTD %', valid_only=True)).total == 0
+    with pytest.raises(KeyError):
+        index.query(Screen('Country'))
@@ -0,0 +1,34 @@
+"""Universe loading: validation and the region and ticker lookups"""
+
+import pytest
+
+from universe import Universe, UniverseError
+
+CSV = """country,region,flag,index,currency
+Ivory Coast,Africa,🇨🇮,N/A,XOF=X
+Senegal,Africa,🇸🇳,N/A,XOF=X
+Brazil,Latin America,🇧🇷,EWZ,BRL=X
+Nigeria,Africa,🇳🇬,NGE,NGN=X
+"""
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'universe.csv'
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_lookups_by_region_and_ticker(tmp_path):
+    universe = Universe.from_csv(write(tmp_path, CSV))
+    assert universe.regions == ['Africa', 'Latin America']
+    assert universe.region_counts() == {'Africa': 3, 'Latin America': 1}
+    assert universe.countries('Africa') == ['Ivory Coast', 'Senegal', 'Nigeria']
+    assert universe.countries_for_ticker('XOF=X') == ['Ivory Coast', 'Senegal']
+    assert universe.countries_for_ticker('EWZ') == ['Brazil']
+    assert universe.countries_for_ticker('N/A') == []
+    assert universe.subset(['Brazil']).countries_for_ticker('XOF=X') == []
+
+
+def test_duplicate_index_ticker_is_rejected(tmp_path):
+    with pytest.raises(UniverseError, match='index tickers used twice'):
+        Universe.from_csv(write(tmp_path, CSV + "Peru,Latin America,🇵🇪,EWZ,PEN=X\n"))
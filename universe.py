@@ -0,0 +1,115 @@
+"""
+SPHAERA MARKET UNIVERSE
+Countries tracked by the dashboard (region, flag, index and currency tickers),
+loaded from data/universe.csv and indexed by country, region and ticker
+"""
+
+import os
+
+import pandas as pd
+
+from file_cache import FileCache
+
+# One row per country; macro inputs (yields, rates, inflation) live in macro_store.py
+UNIVERSE_FILE = os.environ.get(
+    'SPHAERA_UNIVERSE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'universe.csv')
+)
+
+COLUMNS = ['country', 'region', 'flag', 'index', 'currency']
+
+# Placeholder ticker for countries without a tradable index
+NO_TICKER = 'N/A'
+
+
+class UniverseError(ValueError):
+    """The universe file is malformed"""
+
+
+class Universe:
+    """Validated universe table (indexed by country) with region and ticker lookups"""
+
+    def __init__(self, table):
+        self.table = table
+        self._by_region = {region: tuple(rows.index) for region, rows in table.groupby('region', observed=True, sort=False)}
+        self._by_ticker = {}
+        for column in ('index', 'currency'):
+            for country, ticker in table[column].items():
+                if ticker != NO_TICKER:
+                    self._by_ticker.setdefault(ticker, []).append(country)
+
+    @classmethod
+    def from_csv(cls, path=UNIVERSE_FILE):
+        """Read and validate a universe CSV"""
+        # 'N/A' is a real value in the ticker columns, so only empty cells are missing
+        raw = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], skipinitialspace=True)
+        return cls(validate(raw, source=path))
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def regions(self):
+        """Region names, in file order"""
+        return list(self._by_region)
+
+    def region_counts(self):
+        """{region: number of countries}, derived from the data"""
+        return {region: len(countries) for region, countries in self._by_region.items()}
+
+    def countries(self, region=None):
+        """Countries in file order, optionally only those in one region"""
+        if region is None:
+            return list(self.table.index)
+        return list(self._by_region.get(region, ()))
+
+    def countries_for_ticker(self, ticker):
+        """Countries quoting an index or currency ticker (a currency can be shared)"""
+        return list(self._by_ticker.get(ticker, ()))
+
+    def subset(self, countries):
+        """A Universe of just these countries"""
+        return Universe(self.table.loc[list(countries)])
+
+    @property
+    def markets(self):
+        """{country: {'index', 'currency', 'flag'}}"""
+        return self.table[['index', 'currency', 'flag']].astype(object).to_dict(orient='index')
+
+
+def validate(raw, source='universe'):
+    """Typed, compact universe table indexed by country; raises UniverseError on bad input"""
+    missing = [col for col in COLUMNS if col not in raw.columns]
+    if missing:
+        raise UniverseError(f"{source}: missing columns {missing}")
+
+    table = raw[COLUMNS].copy()
+    for col in COLUMNS:
+        table[col] = table[col].str.strip()
+    blank = table.isna()
+    if blank.any(axis=None):
+        rows = [int(i) + 2 for i in blank.index[blank.any(axis=1)]]  # +2: header line, 1-based
+        raise UniverseError(f"{source}: empty text fields on lines {rows}")
+
+    duplicated = table['country'][table['country'].duplicated()].tolist()
+    if duplicated:
+        raise UniverseError(f"{source}: duplicate countries {duplicated}")
+
+    indices = table.loc[table['index'] != NO_TICKER, 'index']
+    if indices.duplicated().any():
+        raise UniverseError(f"{source}: index tickers used twice {indices[indices.duplicated()].tolist()}")
+
+    # Repeated strings stored once
+    table['region'] = pd.Categorical(table['region'], categories=table['region'].unique())
+    table['flag'] = table['flag'].astype('category')
+    return table.set_index('country')
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+_files = FileCache(Universe.from_csv)
+
+
+def load_universe(path=UNIVERSE_FILE):
+    """The universe in path, re-read only when the file has changed since the last call"""
+    return _files.get(path)